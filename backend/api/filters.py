@@ -1,6 +1,7 @@
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import filters, FilterSet
 
-from food.models import Ingredient, Recipe, Tag
+from food.models import Cart, Favorite, Ingredient, Recipe, Tag
 
 
 class RecipeFilter(FilterSet):
@@ -8,11 +9,13 @@ class RecipeFilter(FilterSet):
         queryset=Tag.objects.all(),
         field_name='tags__slug',
         to_field_name='slug',
+        method='filter_tags',
     )
     is_favorited = filters.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
@@ -21,15 +24,43 @@ class RecipeFilter(FilterSet):
             'author',
         )
 
-    def get_is_favorited(self, queryset, name, value):
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe=OuterRef('pk'), tag__in=value
+                )
+            )
+        )
+
+    def filter_search(self, queryset, name, value):
+        value = value.strip()
+        if not value:
+            return queryset
+        return queryset.search(value)
+
+    def filter_marked(self, queryset, model, value):
+        """
+        Semi-join по отметкам пользователя: Exists вместо списка id,
+        чтобы не тащить в запрос неограниченный IN и не зависеть от кеша.
+        """
         if self.request.user.is_authenticated and value:
-            return queryset.filter(favorite__user=self.request.user)
+            return queryset.filter(
+                Exists(
+                    model.objects.filter(
+                        user=self.request.user, recipe=OuterRef('pk')
+                    )
+                )
+            )
         return queryset
 
+    def get_is_favorited(self, queryset, name, value):
+        return self.filter_marked(queryset, Favorite, value)
+
     def get_is_in_shopping_cart(self, queryset, name, value):
-        if self.request.user.is_authenticated and value:
-            return queryset.filter(cart__user=self.request.user)
-        return queryset
+        return self.filter_marked(queryset, Cart, value)
 
 
 class IngredientFilter(FilterSet):
@@ -0,0 +1,273 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_MS = getattr(settings, 'SLOW_REQUEST_MS', 500)
+SLOW_REQUEST_QUERIES = getattr(settings, 'SLOW_REQUEST_QUERIES', 50)
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SLOWEST_SQL_LENGTH = 300
+
+_stats = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.slowest_sql = ''
+        self.slowest_time = 0.0
+        self.serialize_time = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper: замеряет каждый SQL-запрос."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.sql_time += elapsed
+            if elapsed > self.slowest_time:
+                self.slowest_time = elapsed
+                self.slowest_sql = sql
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, endpoint, value):
+        counts, total = self.series.get(
+            endpoint, ([0] * (len(self.buckets) + 1), 0)
+        )
+        counts[bisect_left(self.buckets, value)] += 1
+        self.series[endpoint] = (counts, total + value)
+
+    def expose(self, labels):
+        lines = [
+            f'# HELP {self.name} {self.help_text}',
+            f'# TYPE {self.name} histogram',
+        ]
+        for endpoint, (counts, total) in sorted(self.series.items()):
+            series_labels = f'{labels},endpoint="{endpoint}"'
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{series_labels},le="{bound}"}} '
+                    f'{cumulative}'
+                )
+            lines.append(f'{self.name}_sum{{{series_labels}}} {total}')
+            lines.append(f'{self.name}_count{{{series_labels}}} {cumulative}')
+        return lines
+
+
+class Registry:
+    """Гистограммы по эндпоинтам в памяти процесса-воркера."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {
+            'duration': Histogram(
+                'foodgram_request_duration_seconds',
+                'Total request time.',
+                DURATION_BUCKETS,
+            ),
+            'sql': Histogram(
+                'foodgram_request_sql_seconds',
+                'Time spent in SQL per request.',
+                DURATION_BUCKETS,
+            ),
+            'serialize': Histogram(
+                'foodgram_request_serialize_seconds',
+                'Time spent in serializers per request.',
+                DURATION_BUCKETS,
+            ),
+            'queries': Histogram(
+                'foodgram_request_queries',
+                'SQL queries per request.',
+                QUERY_BUCKETS,
+            ),
+        }
+
+    def observe(self, endpoint, **values):
+        with self.lock:
+            for name, value in values.items():
+                self.histograms[name].observe(endpoint, value)
+
+    def expose(self):
+        labels = f'pid="{os.getpid()}"'
+        with self.lock:
+            lines = [
+                line
+                for histogram in self.histograms.values()
+                for line in histogram.expose(labels)
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+@contextmanager
+def serialization_timer():
+    """
+    Время сериализации верхнего уровня, без вложенных замеров. SQL,
+    выполненный внутри (ленивые queryset, prefetch), из него вычитается:
+    он уже посчитан в db.
+    """
+    stats = _stats.get()
+    if stats is None or stats.serializing:
+        yield
+        return
+    stats.serializing = True
+    started = time.perf_counter()
+    sql_started = stats.sql_time
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stats.serialize_time += max(
+            elapsed - (stats.sql_time - sql_started), 0.0
+        )
+        stats.serializing = False
+
+
+class SerializationTimingMixin:
+    """
+    Замер сериализации в стандартных list и retrieve вьюсета: время
+    действия за вычетом его SQL.
+    """
+
+    def list(self, request, *args, **kwargs):
+        with serialization_timer():
+            return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        with serialization_timer():
+            return super().retrieve(request, *args, **kwargs)
+
+
+@contextmanager
+def sql_timer(stats):
+    with ExitStack() as stack:
+        for alias in settings.DATABASES:
+            stack.enter_context(connections[alias].execute_wrapper(stats))
+        yield
+
+
+def get_endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return f'{request.method} {match.view_name}'
+
+
+class InstrumentationMiddleware:
+    """
+    Считает для каждого запроса число SQL-запросов, время в базе, самый
+    медленный запрос, время сериализации и общее время. Отдает их в
+    заголовке Server-Timing, пишет в лог запросы сверх SLOW_REQUEST_MS
+    или SLOW_REQUEST_QUERIES и копит гистограммы для /api/metrics/.
+    У потоковых ответов SQL считается и во время отдачи тела, а метрики
+    и лог пишутся, когда поток закончился; Server-Timing у них — на
+    момент начала отдачи.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _stats.set(stats)
+        started = time.perf_counter()
+        try:
+            with sql_timer(stats):
+                response = self.get_response(request)
+        finally:
+            _stats.reset(token)
+        response['Server-Timing'] = (
+            f'db;dur={stats.sql_time * 1000:.1f};'
+            f'desc="{stats.queries} queries", '
+            f'serialize;dur={stats.serialize_time * 1000:.1f}, '
+            f'total;dur={(time.perf_counter() - started) * 1000:.1f}'
+        )
+        if response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content, request, stats, started
+            )
+        else:
+            self.record(request, stats, started)
+        return response
+
+    def stream(self, content, request, stats, started):
+        """
+        Отдает тело ответа, считая SQL каждого шага. Обертки SQL ставятся
+        только на время шага: между шагами поток может обслуживать
+        другие запросы.
+        """
+        iterator = iter(content)
+        try:
+            while True:
+                with sql_timer(stats):
+                    chunk = next(iterator, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            self.record(request, stats, started)
+
+    def record(self, request, stats, started):
+        total = time.perf_counter() - started
+        endpoint = get_endpoint(request)
+        registry.observe(
+            endpoint,
+            duration=total,
+            sql=stats.sql_time,
+            serialize=stats.serialize_time,
+            queries=stats.queries,
+        )
+        if (
+            total * 1000 >= SLOW_REQUEST_MS
+            or stats.queries >= SLOW_REQUEST_QUERIES
+        ):
+            logger.warning(
+                'Slow request %s %s: %.0f ms, %d queries, %.0f ms SQL, '
+                '%.0f ms serialize; slowest query %.0f ms: %s',
+                endpoint,
+                request.get_full_path(),
+                total * 1000,
+                stats.queries,
+                stats.sql_time * 1000,
+                stats.serialize_time * 1000,
+                stats.slowest_time * 1000,
+                stats.slowest_sql[:SLOWEST_SQL_LENGTH],
+            )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """Гистограммы по эндпоинтам в текстовом формате Prometheus."""
+    return HttpResponse(
+        registry.expose(), content_type='text/plain; version=0.0.4'
+    )
@@ -0,0 +1,138 @@
+from base64 import b64decode, b64encode
+from binascii import Error as DecodeError
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    LimitOffsetPagination,
+)
+
+
+def encode_key(key):
+    pub_date, recipe_id = key
+    return f'{pub_date.isoformat()}|{recipe_id}'
+
+
+def decode_key(value):
+    """Ключ (pub_date, recipe_id); ValueError для испорченной строки."""
+    pub_date, recipe_id = value.split('|')
+    return datetime.fromisoformat(pub_date), int(recipe_id)
+
+
+class RecipeCursorPagination(CursorPagination):
+    """
+    Keyset по паре (pub_date, id): позиция курсора хранит оба значения,
+    страница выбирается сравнением кортежей без OFFSET, поэтому рецепты
+    с одинаковым pub_date не теряются и не повторяются.
+    """
+
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'limit'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        self.position = None
+        if self.cursor is not None and self.cursor.position is not None:
+            try:
+                self.position = decode_key(self.cursor.position)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+        if reverse:
+            queryset = queryset.order_by('pub_date', 'id')
+        else:
+            queryset = queryset.order_by('-pub_date', '-id')
+        if self.position is not None:
+            pub_date, recipe_id = self.position
+            lookup = 'gt' if reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'pub_date__{lookup}': pub_date})
+                | Q(pub_date=pub_date, **{f'id__{lookup}': recipe_id})
+            )
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        has_position = self.position is not None
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = has_position, has_more
+        else:
+            self.has_next, self.has_previous = has_more, has_position
+        self.display_page_controls = self.has_next or self.has_previous
+        return self.page
+
+    def get_link(self, recipe, reverse):
+        key = self.position
+        if recipe is not None:
+            key = (recipe.pub_date, recipe.pk)
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=reverse, position=encode_key(key))
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.get_link(self.page[-1] if self.page else None, False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.get_link(self.page[0] if self.page else None, True)
+
+
+class UserCursorPagination(CursorPagination):
+    ordering = ('id',)
+    page_size_query_param = 'limit'
+
+
+class LimitOffsetOrCursorPagination(LimitOffsetPagination):
+    """
+    Пагинация limit/offset, а при наличии параметра cursor (в том числе
+    пустого) — keyset по полям ordering без подсчета общего количества.
+    """
+
+    cursor_query_param = 'cursor'
+    cursor_pagination_class = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class RecipePagination(LimitOffsetOrCursorPagination):
+    cursor_pagination_class = RecipeCursorPagination
+
+
+class UserPagination(LimitOffsetOrCursorPagination):
+    cursor_pagination_class = UserCursorPagination
+
+
+def encode_feed_cursor(key):
+    return b64encode(encode_key(key).encode()).decode()
+
+
+def decode_feed_cursor(cursor):
+    """Ключ (pub_date, recipe_id) из непрозрачного курсора ленты."""
+    if not cursor:
+        return None
+    try:
+        return decode_key(b64decode(cursor).decode())
+    except (DecodeError, UnicodeDecodeError, ValueError):
+        raise NotFound('Invalid cursor')
@@ -0,0 +1,208 @@
+import cProfile
+import io
+import json
+import pstats
+import re
+import time
+import traceback
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib import admin
+from django.db import connections
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+
+from .authentication import CachedTokenAuthentication
+
+PROFILE_DIR = Path(
+    getattr(settings, 'PROFILE_DIR', settings.BASE_DIR / 'profiles')
+)
+PROFILE_RETENTION = getattr(settings, 'PROFILE_RETENTION', 50)
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = 'profile'
+PROFILE_NAME = re.compile(r'^[\w-]+$')
+STATS_LINES = 40
+
+
+def is_requested(request):
+    return PROFILE_HEADER in request.META or PROFILE_PARAM in request.GET
+
+
+def get_staff_user(request):
+    """Сотрудник по токену API или по сессии админки."""
+    try:
+        authenticated = CachedTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    user = authenticated[0] if authenticated else request.user
+    return user if user.is_active and user.is_staff else None
+
+
+class SQLCallSites:
+    """execute_wrapper: группирует SQL по месту вызова в коде проекта."""
+
+    def __init__(self):
+        self.sites = {}
+
+    def call_site(self):
+        base_dir = str(settings.BASE_DIR)
+        for frame in reversed(traceback.extract_stack()[:-2]):
+            if (
+                frame.filename.startswith(base_dir)
+                and 'site-packages' not in frame.filename
+                and frame.filename != __file__
+            ):
+                filename = frame.filename[len(base_dir) + 1:]
+                return f'{filename}:{frame.lineno} {frame.name}'
+        return 'unknown'
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            site = self.sites.setdefault(
+                self.call_site(), {'count': 0, 'time_ms': 0.0, 'sql': sql}
+            )
+            site['count'] += 1
+            site['time_ms'] += elapsed * 1000
+
+    def report(self):
+        return sorted(
+            (
+                {'site': site, **values}
+                for site, values in self.sites.items()
+            ),
+            key=lambda values: values['time_ms'],
+            reverse=True,
+        )
+
+
+def enforce_retention():
+    profiles = sorted(PROFILE_DIR.glob('*.prof'))
+    for profile in profiles[:-PROFILE_RETENTION]:
+        profile.unlink(missing_ok=True)
+        profile.with_suffix('.json').unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос в cProfile, если он пришел с заголовком X-Profile
+    или параметром ?profile от сотрудника. Статистика и SQL по местам
+    вызова сохраняются в PROFILE_DIR, хранятся последние
+    PROFILE_RETENTION профилей. Без флага — одна проверка словаря.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_requested(request):
+            return self.get_response(request)
+        user = get_staff_user(request)
+        if user is None:
+            return self.get_response(request)
+        sql = SQLCallSites()
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in settings.DATABASES:
+                stack.enter_context(connections[alias].execute_wrapper(sql))
+            response = profile.runcall(self.get_response, request)
+        duration = time.perf_counter() - started
+        name = (
+            f'{timezone.now():%Y%m%d-%H%M%S-%f}-'
+            f'{request.method.lower()}-{user.pk}'
+        )
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(PROFILE_DIR / f'{name}.prof')
+        meta = {
+            'name': name,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'user': user.get_username(),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'sql': sql.report(),
+        }
+        with open(PROFILE_DIR / f'{name}.json', 'w') as file:
+            json.dump(meta, file)
+        enforce_retention()
+        response['X-Profile-Id'] = name
+        return response
+
+
+def load_meta(name):
+    if not PROFILE_NAME.match(name):
+        raise Http404
+    try:
+        with open(PROFILE_DIR / f'{name}.json') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        raise Http404
+
+
+def profile_list(request):
+    profiles = [
+        load_meta(meta.stem)
+        for meta in sorted(PROFILE_DIR.glob('*.json'), reverse=True)
+    ]
+    for meta in profiles:
+        meta['queries'] = sum(site['count'] for site in meta['sql'])
+    return TemplateResponse(
+        request,
+        'admin/profiles/list.html',
+        {
+            **admin.site.each_context(request),
+            'title': 'Профили запросов',
+            'profiles': profiles,
+        },
+    )
+
+
+def profile_detail(request, name):
+    meta = load_meta(name)
+    stats_output = io.StringIO()
+    pstats.Stats(
+        str(PROFILE_DIR / f'{name}.prof'), stream=stats_output
+    ).sort_stats('cumulative').print_stats(STATS_LINES)
+    return TemplateResponse(
+        request,
+        'admin/profiles/detail.html',
+        {
+            **admin.site.each_context(request),
+            'title': f'{meta["method"]} {meta["path"]}',
+            'profile': meta,
+            'stats': stats_output.getvalue(),
+        },
+    )
+
+
+def profile_download(request, name):
+    load_meta(name)
+    return FileResponse(
+        open(PROFILE_DIR / f'{name}.prof', 'rb'),
+        as_attachment=True,
+        filename=f'{name}.prof',
+    )
+
+
+urlpatterns = [
+    path('', admin.site.admin_view(profile_list), name='profile_list'),
+    path(
+        '<str:name>/',
+        admin.site.admin_view(profile_detail),
+        name='profile_detail',
+    ),
+    path(
+        '<str:name>/download/',
+        admin.site.admin_view(profile_download),
+        name='profile_download',
+    ),
+]
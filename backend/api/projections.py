@@ -0,0 +1,148 @@
+from collections import defaultdict
+
+from django.conf import settings
+
+from .recipe_cache import get_representations
+from .serializers import user_recipe_ids
+from food.images import IMAGE_VARIANTS
+from food.models import Cart, Favorite, Recipe, RecipeIngredient, Tag
+from users.models import Subscription, User
+
+FAST_READ_PATH = getattr(settings, 'FAST_READ_PATH', False)
+AUTHOR_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name')
+TAG_FIELDS = ('id', 'name', 'color', 'slug')
+RECIPE_FIELDS = (
+    'id',
+    'author_id',
+    'image',
+    'image_variants',
+    'name',
+    'text',
+    'cooking_time',
+)
+
+
+def tag_list():
+    """Теги словарями в форме TagSerializer."""
+    return list(Tag.objects.values(*TAG_FIELDS))
+
+
+def _image_urls(request, image, variants):
+    """Ссылки в форме Base64ImageField и image_variant_url."""
+    if not image:
+        return None, dict.fromkeys(IMAGE_VARIANTS)
+    storage = Recipe._meta.get_field('image').storage
+
+    def absolute(name):
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+
+    return absolute(image), {
+        variant: absolute(variants.get(variant) or image)
+        for variant in IMAGE_VARIANTS
+    }
+
+
+def _build_shared(recipe_ids, request):
+    """
+    Общая часть представлений RecipeSerializer из строк .values():
+    четыре запроса на всю пачку и никаких экземпляров моделей. Порядок
+    тегов и ингредиентов — по id, как в Meta.ordering моделей.
+    """
+    recipes = list(
+        Recipe.objects.filter(id__in=recipe_ids)
+        .order_by()
+        .values(*RECIPE_FIELDS)
+    )
+    authors = {
+        author['id']: author
+        for author in User.objects.filter(
+            id__in={recipe['author_id'] for recipe in recipes}
+        ).values(*AUTHOR_FIELDS)
+    }
+    ingredients = defaultdict(list)
+    for row in (
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+        .order_by('id')
+        .values_list(
+            'recipe_id',
+            'ingredient_id',
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            'amount',
+        )
+    ):
+        ingredients[row[0]].append(
+            {
+                'id': row[1],
+                'name': row[2],
+                'measurement_unit': row[3],
+                'amount': row[4],
+            }
+        )
+    tags = defaultdict(list)
+    for recipe_id, *tag in (
+        Recipe.tags.through.objects.filter(recipe_id__in=recipe_ids)
+        .order_by('tag_id')
+        .values_list('recipe_id', *(f'tag__{field}' for field in TAG_FIELDS))
+    ):
+        tags[recipe_id].append(dict(zip(TAG_FIELDS, tag)))
+    shared = {}
+    for recipe in recipes:
+        image, image_variants = _image_urls(
+            request, recipe['image'], recipe['image_variants']
+        )
+        shared[recipe['id']] = {
+            'id': recipe['id'],
+            'author': dict(authors[recipe['author_id']]),
+            'ingredients': ingredients[recipe['id']],
+            'tags': tags[recipe['id']],
+            'image': image,
+            'image_variants': image_variants,
+            'name': recipe['name'],
+            'text': recipe['text'],
+            'cooking_time': recipe['cooking_time'],
+        }
+    return shared
+
+
+def recipe_list(recipe_ids, request):
+    """
+    Представления рецептов в порядке recipe_ids, совпадающие с выводом
+    RecipeSerializer. Общая часть берется из того же кеша, флаги
+    пользователя досчитываются одним запросом на подписки.
+    """
+    shared = get_representations(
+        recipe_ids,
+        request,
+        lambda missing: _build_shared(missing, request),
+    )
+    user = request.user
+    subscribed = favorites = in_cart = frozenset()
+    if user.is_authenticated:
+        author_ids = {data['author']['id'] for data in shared.values()}
+        subscribed = frozenset(
+            Subscription.objects.filter(
+                user=user, author_id__in=author_ids
+            ).values_list('author_id', flat=True)
+        )
+        favorites = user_recipe_ids(request, Favorite)
+        in_cart = user_recipe_ids(request, Cart)
+    results = []
+    for recipe_id in recipe_ids:
+        data = shared.get(recipe_id)
+        if data is None:
+            continue
+        author = data['author']
+        results.append(
+            {
+                **data,
+                'author': {
+                    **author,
+                    'is_subscribed': author['id'] in subscribed,
+                },
+                'is_favorited': recipe_id in favorites,
+                'is_in_shopping_cart': recipe_id in in_cart,
+            }
+        )
+    return results
@@ -0,0 +1,208 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from food.images import recipe_images_ready
+from food.models import Ingredient, Recipe, RecipeIngredient, Tag
+from foodgram_backend.routers import get_replicas
+from users.models import User
+
+RECIPE_VERSION_KEY = 'recipe_version:{}'
+RECIPE_SETTLING_KEY = 'recipe_settling:{}'
+RECIPE_DATA_KEY = 'recipe_data:{}:{}:{}'
+RECIPE_CACHE_TTL = getattr(settings, 'RECIPE_CACHE_TTL', 3600)
+REPLICA_STICKY_SECONDS = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+
+def get_representation(recipe_id, request, build):
+    """
+    Общая для всех пользователей часть представления рецепта.
+    Ключ содержит версию рецепта, поэтому для сброса достаточно
+    удалить версию; хост входит в ключ из-за абсолютных ссылок.
+    Пока после правки не прошло окно отставания реплик, представление
+    собирается без кеша, чтобы не закрепить в нем старые данные.
+    """
+    version_key = RECIPE_VERSION_KEY.format(recipe_id)
+    settling_key = RECIPE_SETTLING_KEY.format(recipe_id)
+    found = cache.get_many((version_key, settling_key))
+    if settling_key in found:
+        return build()
+    version = found.get(version_key)
+    if version is None:
+        version = uuid4().hex
+        cache.set(version_key, version, RECIPE_CACHE_TTL)
+    host = request.get_host() if request is not None else ''
+    data_key = RECIPE_DATA_KEY.format(recipe_id, version, host)
+    data = cache.get(data_key)
+    if data is None:
+        data = build()
+        cache.set(data_key, data, RECIPE_CACHE_TTL)
+    return data
+
+
+def get_representations(recipe_ids, request, build):
+    """
+    То же для списка рецептов за несколько обращений к кешу: build
+    получает id промахов и возвращает {id: представление}. Удаленные
+    рецепты в ответ не попадают.
+    """
+    version_keys = {
+        recipe_id: RECIPE_VERSION_KEY.format(recipe_id)
+        for recipe_id in recipe_ids
+    }
+    settling_keys = {
+        recipe_id: RECIPE_SETTLING_KEY.format(recipe_id)
+        for recipe_id in recipe_ids
+    }
+    versions = cache.get_many(
+        [*version_keys.values(), *settling_keys.values()]
+    )
+    settling = {
+        recipe_id
+        for recipe_id, key in settling_keys.items()
+        if key in versions
+    }
+    new_versions = {
+        key: uuid4().hex
+        for recipe_id, key in version_keys.items()
+        if key not in versions and recipe_id not in settling
+    }
+    if new_versions:
+        cache.set_many(new_versions, RECIPE_CACHE_TTL)
+        versions.update(new_versions)
+    host = request.get_host() if request is not None else ''
+    data_keys = {
+        recipe_id: RECIPE_DATA_KEY.format(recipe_id, versions[key], host)
+        for recipe_id, key in version_keys.items()
+        if recipe_id not in settling
+    }
+    found = cache.get_many(data_keys.values())
+    missing = [
+        recipe_id
+        for recipe_id in recipe_ids
+        if recipe_id in settling or data_keys[recipe_id] not in found
+    ]
+    results = {
+        recipe_id: found[key]
+        for recipe_id, key in data_keys.items()
+        if key in found
+    }
+    if missing:
+        built = build(missing)
+        cache.set_many(
+            {
+                data_keys[recipe_id]: data
+                for recipe_id, data in built.items()
+                if recipe_id not in settling
+            },
+            RECIPE_CACHE_TTL,
+        )
+        results.update(built)
+    return results
+
+
+def invalidate_recipes(recipe_ids):
+    """
+    Сбрасывает версии после коммита. С репликами рецепты еще
+    REPLICA_STICKY_SECONDS не кешируются: первое чтение после правки
+    может прийти с отстающей реплики.
+    """
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+
+    def invalidate():
+        cache.delete_many(
+            [RECIPE_VERSION_KEY.format(recipe_id) for recipe_id in recipe_ids]
+        )
+        if get_replicas():
+            cache.set_many(
+                {
+                    RECIPE_SETTLING_KEY.format(recipe_id): True
+                    for recipe_id in recipe_ids
+                },
+                REPLICA_STICKY_SECONDS,
+            )
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    invalidate_recipes([instance.id])
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    invalidate_recipes([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_recipes([instance.id])
+    elif pk_set:
+        invalidate_recipes(pk_set)
+    else:
+        invalidate_recipes(
+            Recipe.objects.filter(tags=instance).values_list('id', flat=True)
+        )
+
+
+@receiver(recipe_images_ready)
+def recipe_images_changed(sender, recipe_id, **kwargs):
+    invalidate_recipes([recipe_id])
+
+
+@receiver(post_save, sender=Tag)
+def tag_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_recipes(
+            Recipe.objects.filter(tags=instance).values_list('id', flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    """
+    Строки recipe_tags удаляются каскадом без m2m_changed, поэтому
+    рецепты с тегом собираются до удаления.
+    """
+    tag_changed(sender, instance, created=False)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_recipes(
+            RecipeIngredient.objects.filter(ingredient=instance).values_list(
+                'recipe_id', flat=True
+            )
+        )
+
+
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_deleted(sender, instance, **kwargs):
+    ingredient_changed(sender, instance, created=False)
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, update_fields, **kwargs):
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    invalidate_recipes(
+        Recipe.objects.filter(author=instance).values_list('id', flat=True)
+    )
@@ -0,0 +1,120 @@
+import csv
+import json
+from abc import ABC, abstractmethod
+
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ShoppingListRendererMixin(ABC):
+    """
+    Рендерер списка покупок, отдающий файл по частям.
+    Строки приходят словарями с ключами name, measurement_unit и total.
+    """
+
+    @abstractmethod
+    def stream(self, ingredients):
+        """Итератор строк файла."""
+
+    @property
+    def filename(self):
+        return f'shopping_cart.{self.format}'
+
+
+class ShoppingListTextRenderer(
+    ShoppingListRendererMixin, renderers.BaseRenderer
+):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            return '\n'.join(
+                f'{key}: {value}' for key, value in data.items()
+            ).encode(self.charset)
+        return ''.join(self.stream(data)).encode(self.charset)
+
+    def stream(self, ingredients):
+        yield 'К покупке:\n'
+        for ingredient in ingredients:
+            name = ingredient['name']
+            unit = ingredient['measurement_unit']
+            amount = ingredient['total']
+            yield f'\n{name} - {amount}, {unit}'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+class ShoppingListCSVRenderer(ShoppingListTextRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, ingredients):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(('name', 'measurement_unit', 'amount'))
+        for ingredient in ingredients:
+            yield writer.writerow(
+                (
+                    ingredient['name'],
+                    ingredient['measurement_unit'],
+                    ingredient['total'],
+                )
+            )
+
+
+class ShoppingListJSONRenderer(
+    ShoppingListRendererMixin, renderers.JSONRenderer
+):
+    def stream(self, ingredients):
+        separator = '['
+        for ingredient in ingredients:
+            yield separator + json.dumps(
+                {
+                    'name': ingredient['name'],
+                    'measurement_unit': ingredient['measurement_unit'],
+                    'amount': ingredient['total'],
+                },
+                ensure_ascii=False,
+            )
+            separator = ','
+        yield '[]' if separator == '[' else ']'
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer на orjson с тем же компактным выводом в UTF-8, что и у
+    стандартного. Типы, которых orjson не знает (даты, Decimal, ленивые
+    строки), кодирует энкодер DRF. Без orjson, с отступами или при
+    ошибке кодирования работает стандартный рендерер.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+            is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029'
+        )
@@ -1,9 +1,12 @@
-from django.shortcuts import get_object_or_404
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from .recipe_cache import get_representation
+from food.images import IMAGE_VARIANTS, schedule_variants
+from food.membership import get_recipe_ids
 from food.models import (
     Cart,
     Favorite,
@@ -12,8 +15,32 @@ from food.models import (
     Recipe,
     RecipeIngredient,
 )
+from food.shopping_list import apply_recipe_change
 from users.models import Subscription, User
 
+RECIPE_IDS_MAX_LENGTH = 100
+
+
+def image_variant_url(serializer, recipe, variant):
+    """
+    Адрес уменьшенной копии изображения; пока копия не готова
+    отдается оригинал.
+    """
+    if not recipe.image:
+        return None
+    name = recipe.image_variants.get(variant)
+    url = recipe.image.storage.url(name) if name else recipe.image.url
+    request = serializer.context.get('request')
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def user_recipe_ids(request, model):
+    """Id рецептов пользователя из кеша, один раз на запрос."""
+    attr = f'_{model._meta.model_name}_recipe_ids'
+    if not hasattr(request, attr):
+        setattr(request, attr, get_recipe_ids(request.user, model))
+    return getattr(request, attr)
+
 
 class SignUpSerializer(UserCreateSerializer):
     class Meta:
@@ -48,6 +75,8 @@ class UserSerializer(UserSerializer):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return Subscription.objects.filter(
             user=request.user, author=obj
         ).exists()
@@ -58,9 +87,6 @@ class UserSubscriptionSerializer(serializers.ModelSerializer):
         method_name='get_is_subscribed'
     )
     recipes = serializers.SerializerMethodField(method_name='get_recipes')
-    recipes_count = serializers.SerializerMethodField(
-        method_name='get_recipes_count'
-    )
 
     class Meta:
         model = User
@@ -85,6 +111,8 @@ class UserSubscriptionSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         return (
             request.user.is_authenticated
@@ -94,16 +122,17 @@ class UserSubscriptionSerializer(serializers.ModelSerializer):
         )
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        recipes_limit = request.query_params.get('recipes_limit')
-        recipes = Recipe.objects.filter(author=obj)
-        if recipes_limit:
-            recipes = recipes[: int(recipes_limit)]
+        recipes_by_author = self.context.get('recipes_by_author')
+        if recipes_by_author is not None:
+            recipes = recipes_by_author.get(obj.id, [])
+        else:
+            request = self.context.get('request')
+            recipes_limit = request.query_params.get('recipes_limit')
+            recipes = Recipe.objects.filter(author=obj)
+            if recipes_limit:
+                recipes = recipes[: int(recipes_limit)]
         return RecipeSmallSerializer(recipes, many=True, read_only=True).data
 
-    def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj).count()
-
 
 class SubscriptionSerializer(serializers.Serializer):
     author = serializers.IntegerField()
@@ -175,10 +204,15 @@ class IngredientGetSerializer(serializers.ModelSerializer):
 
 
 class RecipeSmallSerializer(serializers.ModelSerializer):
+    image = serializers.SerializerMethodField()
+
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
 
+    def get_image(self, obj):
+        return image_variant_url(self, obj, 'thumbnail')
+
 
 class RecipeSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
@@ -187,6 +221,7 @@ class RecipeSerializer(serializers.ModelSerializer):
     )
     tags = TagSerializer(many=True, read_only=True)
     image = Base64ImageField()
+    image_variants = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -198,6 +233,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             'ingredients',
             'tags',
             'image',
+            'image_variants',
             'name',
             'text',
             'cooking_time',
@@ -205,17 +241,48 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
         )
 
+    def to_representation(self, instance):
+        data = get_representation(
+            instance.id,
+            self.context.get('request'),
+            lambda: self.shared_representation(instance),
+        )
+        author = self.fields['author']
+        return {
+            **data,
+            'author': {
+                **data['author'],
+                'is_subscribed': author.get_is_subscribed(instance.author),
+            },
+            'is_favorited': self.get_is_favorited(instance),
+            'is_in_shopping_cart': self.get_is_in_shopping_cart(instance),
+        }
+
+    def shared_representation(self, instance):
+        """Представление без полей, зависящих от пользователя."""
+        data = super().to_representation(instance)
+        data.pop('is_favorited')
+        data.pop('is_in_shopping_cart')
+        data['author'].pop('is_subscribed')
+        return data
+
+    def get_image_variants(self, obj):
+        return {
+            variant: image_variant_url(self, obj, variant)
+            for variant in IMAGE_VARIANTS
+        }
+
     def get_is_favorited(self, obj):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
-        return Favorite.objects.filter(user=request.user, recipe=obj).exists()
+        return obj.id in user_recipe_ids(request, Favorite)
 
     def get_is_in_shopping_cart(self, obj):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
-        return Cart.objects.filter(user=request.user, recipe=obj).exists()
+        return obj.id in user_recipe_ids(request, Cart)
 
 
 class PostRecipeSerializer(serializers.ModelSerializer):
@@ -270,26 +337,70 @@ class PostRecipeSerializer(serializers.ModelSerializer):
                     'Этот ингридиент уже добавлен'
                 )
             ingredients_list.append(ingredient.get('id'))
-            if not Ingredient.objects.filter(id=ingredient.get('id')).exists():
-                raise serializers.ValidationError(
-                    'Этого ингридиента нет в базе'
-                )
+        missing = set(ingredients_list).difference(
+            Ingredient.objects.filter(id__in=ingredients_list).values_list(
+                'id', flat=True
+            )
+        )
+        if missing:
+            raise serializers.ValidationError(
+                'Этих ингридиентов нет в базе: '
+                + ', '.join(map(str, sorted(missing)))
+            )
         return data
 
     def recipe_ingredient_create(self, recipe, ingredients):
-        ingredients_list = []
-        for ingredient in ingredients:
-            get_ingridient = get_object_or_404(
-                Ingredient, id=ingredient.get('id')
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient_id=ingredient.get('id'),
+                amount=ingredient.get('amount'),
             )
-            amount = ingredient.get('amount')
-            ingredients_list.append(
-                RecipeIngredient(
-                    recipe=recipe, ingredient=get_ingridient, amount=amount
-                )
+            for ingredient in ingredients
+        )
+
+    def recipe_ingredient_update(self, recipe, ingredients):
+        """
+        Приводит ингредиенты рецепта к новому составу, меняя только
+        отличающиеся строки: новые добавляет, убранные удаляет,
+        у оставшихся обновляет количество. Возвращает прежний и новый
+        состав вида {ingredient_id: количество}.
+        """
+        amounts = {
+            ingredient.get('id'): ingredient.get('amount')
+            for ingredient in ingredients
+        }
+        before = {}
+        current = {}
+        stale = []
+        changed = []
+        for row in RecipeIngredient.objects.filter(recipe=recipe):
+            before[row.ingredient_id] = (
+                before.get(row.ingredient_id, 0) + row.amount
             )
-        RecipeIngredient.objects.bulk_create(ingredients_list)
+            amount = amounts.get(row.ingredient_id)
+            if amount is None or row.ingredient_id in current:
+                stale.append(row.id)
+                continue
+            current[row.ingredient_id] = row
+            if row.amount != amount:
+                row.amount = amount
+                changed.append(row)
+        if stale:
+            RecipeIngredient.objects.filter(id__in=stale).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        self.recipe_ingredient_create(
+            recipe,
+            [
+                ingredient
+                for ingredient in ingredients
+                if ingredient.get('id') not in current
+            ],
+        )
+        return before, amounts
 
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context.get('request')
         ingredients = validated_data.pop('recipeingredient')
@@ -297,17 +408,21 @@ class PostRecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=request.user, **validated_data)
         recipe.tags.set(tags)
         self.recipe_ingredient_create(recipe, ingredients)
+        schedule_variants(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('recipeingredient')
         tags = validated_data.pop('tags')
-        instance.tags.clear()
         instance.tags.set(tags)
-        RecipeIngredient.objects.filter(recipe=instance).delete()
+        if 'image' in validated_data:
+            schedule_variants(instance, instance.image_variants.values())
+            validated_data['image_variants'] = {}
         super().update(instance, validated_data)
-        self.recipe_ingredient_create(instance, ingredients)
-        instance.save()
+        apply_recipe_change(
+            instance.id, *self.recipe_ingredient_update(instance, ingredients)
+        )
         return instance
 
     def to_representation(self, instance):
@@ -363,3 +478,14 @@ class CartSerializer(serializers.ModelSerializer):
         return RecipeSmallSerializer(
             instance, context={'request': self.context.get('request')}
         ).data
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=RECIPE_IDS_MAX_LENGTH,
+    )
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
@@ -0,0 +1,62 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.test import TransactionTestCase
+from rest_framework.authtoken.models import Token
+
+from .utils import create_ingredients, create_recipe, create_user
+from api.instrumentation import registry
+from food.models import Cart
+from foodgram_backend.asgi import application
+
+
+class StreamingASGIHandlerTests(TransactionTestCase):
+    """Список покупок отдается по частям и в режиме ASGI."""
+
+    def setUp(self):
+        user = create_user('buyer')
+        ingredients = create_ingredients(3)
+        recipe = create_recipe(create_user('author'), (), ingredients)
+        Cart.objects.create(user=user, recipe=recipe)
+        self.token = Token.objects.create(user=user).key
+
+    @async_to_sync
+    async def request(self, path, accept=b'text/plain'):
+        communicator = ApplicationCommunicator(
+            application,
+            {
+                'type': 'http',
+                'method': 'GET',
+                'path': path,
+                'query_string': b'',
+                'headers': [
+                    (b'host', b'testserver'),
+                    (b'accept', accept),
+                    (b'authorization', f'Token {self.token}'.encode()),
+                ],
+            },
+        )
+        await communicator.send_input({'type': 'http.request'})
+        start = await communicator.receive_output(5)
+        messages = []
+        while True:
+            message = await communicator.receive_output(5)
+            messages.append(message)
+            if not message.get('more_body'):
+                break
+        return start, messages
+
+    def test_download_is_streamed(self):
+        start, messages = self.request('/api/recipes/download_shopping_cart/')
+        self.assertEqual(start['status'], 200)
+        self.assertGreater(len(messages), 2)
+        content = b''.join(message.get('body', b'') for message in messages)
+        self.assertIn('Ингредиент 2 - 10, г', content.decode())
+
+    def test_routes_keep_router_names(self):
+        """Метрики в режиме ASGI подписаны именами маршрутов роутера."""
+        with mock.patch.object(registry, 'observe') as observe:
+            start, _ = self.request('/api/tags/', b'application/json')
+        self.assertEqual(start['status'], 200)
+        self.assertEqual(observe.call_args.args[0], 'GET tag-list')
@@ -0,0 +1,34 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from .utils import create_ingredients
+from food.catalog import invalidate_catalog_version
+from food.models import Ingredient
+from food.search import ingredient_index
+
+INGREDIENTS_URL = '/api/ingredients/'
+
+
+class IngredientCatalogTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ingredient, = create_ingredients(1)
+
+    def setUp(self):
+        cache.clear()
+        ingredient_index.invalidate()
+
+    def test_change_in_other_process_rebuilds_index(self):
+        etag = self.client.get(INGREDIENTS_URL)['ETag']
+        # Правка в другом процессе: строки и общая версия в кеше
+        # меняются без сигналов в этом процессе.
+        Ingredient.objects.update(name='Новое название')
+        invalidate_catalog_version(Ingredient)
+        response = self.client.get(INGREDIENTS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()[0]['name'], 'Новое название')
+        response = self.client.get(
+            INGREDIENTS_URL, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APITestCase
+
+from .utils import create_ingredients, create_recipe, create_user
+from api.instrumentation import (
+    RequestStats,
+    _stats,
+    registry,
+    serialization_timer,
+    sql_timer,
+)
+from food.models import Cart
+
+
+class InstrumentationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('buyer')
+        recipe = create_recipe(
+            create_user('author'), ingredients=create_ingredients(2)
+        )
+        Cart.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+        patcher = mock.patch.object(registry, 'observe')
+        self.observe = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def observed(self):
+        self.observe.assert_called_once()
+        return self.observe.call_args.kwargs
+
+    def test_serializer_is_not_patched(self):
+        self.assertEqual(
+            BaseSerializer.data.fget.__qualname__, 'BaseSerializer.data'
+        )
+
+    def test_serialization_time_in_views(self):
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(self.observed()['serialize'], 0)
+        self.assertIn('serialize;dur=', response['Server-Timing'])
+
+    def test_streaming_queries_are_counted(self):
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/', HTTP_ACCEPT='text/plain'
+        )
+        self.assertTrue(response.streaming)
+        self.observe.assert_not_called()
+        with CaptureQueriesContext(connection) as streamed:
+            b''.join(response.streaming_content)
+        self.assertGreaterEqual(len(streamed), 1)
+        self.assertGreater(self.observed()['queries'], len(streamed))
+
+    def test_serialization_time_excludes_sql(self):
+        stats = RequestStats()
+        token = _stats.set(stats)
+        self.addCleanup(_stats.reset, token)
+        with sql_timer(stats), serialization_timer():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_sleep(0.2)')
+        self.assertGreaterEqual(stats.sql_time, 0.2)
+        self.assertLess(stats.serialize_time, 0.1)
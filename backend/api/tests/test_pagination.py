@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .utils import create_recipe, create_user
+from food.models import Recipe
+
+
+class RecipeCursorPaginationTests(APITestCase):
+    """Курсор по (pub_date, id) проходит рецепты с одинаковой датой."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        for number in range(7):
+            create_recipe(author, name=f'Рецепт {number}')
+        Recipe.objects.update(pub_date=timezone.now())
+        cls.expected = list(
+            Recipe.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, url, direction):
+        """Страницы по ссылкам direction и ссылка назад с последней."""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([recipe['id'] for recipe in response.data['results']])
+            url = response.data[direction]
+        back = 'previous' if direction == 'next' else 'next'
+        return pages, response.data[back]
+
+    def test_forward_and_back(self):
+        pages, previous = self.walk('/api/recipes/?limit=3&cursor=', 'next')
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(
+            [recipe_id for page in pages for recipe_id in page],
+            self.expected,
+        )
+        back, _ = self.walk(previous, 'previous')
+        self.assertEqual(back, pages[1::-1])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/recipes/?cursor=cD1iYWQ=')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,94 @@
+import datetime
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from .utils import create_ingredients, create_tags, create_user
+from api.renderers import FastJSONRenderer
+from food.models import Cart, Favorite, Recipe, RecipeIngredient
+from users.models import Subscription
+
+
+class ReadPathContractTests(APITestCase):
+    """Быстрый путь чтения отдает те же байты, что и сериализаторы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        author = create_user('author')
+        tags = create_tags(3)
+        ingredients = create_ingredients(3)
+        cls.recipes = []
+        for number in range(2):
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {number}',
+                text='Описание с разделителем',
+                cooking_time=10 + number,
+            )
+            # Связи вставляются не по порядку id, чтобы порядок строк
+            # таблиц не совпадал с порядком вывода.
+            for tag in reversed(tags):
+                recipe.tags.add(tag)
+            for amount, ingredient in enumerate(reversed(ingredients), 1):
+                RecipeIngredient.objects.create(
+                    recipe=recipe, ingredient=ingredient, amount=amount
+                )
+            cls.recipes.append(recipe)
+        Subscription.objects.create(user=cls.user, author=author)
+        Favorite.objects.create(user=cls.user, recipe=cls.recipes[0])
+        Cart.objects.create(user=cls.user, recipe=cls.recipes[1])
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, fast):
+        cache.clear()
+        with mock.patch('api.views.FAST_READ_PATH', fast):
+            response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def assert_same(self, url):
+        self.assertEqual(self.get(url, fast=True), self.get(url, fast=False))
+
+    def test_recipe_list(self):
+        self.assert_same('/api/recipes/')
+
+    def test_recipe_detail(self):
+        self.assert_same(f'/api/recipes/{self.recipes[0].id}/')
+
+    def test_tag_list(self):
+        self.assert_same('/api/tags/')
+
+    def test_tags_and_ingredients_order(self):
+        for fast in (True, False):
+            data = json.loads(
+                self.get(f'/api/recipes/{self.recipes[0].id}/', fast)
+            )
+            ids = [tag['id'] for tag in data['tags']]
+            self.assertEqual(ids, sorted(ids))
+            amounts = [item['amount'] for item in data['ingredients']]
+            self.assertEqual(amounts, [1, 2, 3])
+
+    def test_retrieve_missing_representation(self):
+        with mock.patch('api.views.FAST_READ_PATH', True), mock.patch(
+            'api.views.recipe_list', return_value=[]
+        ):
+            response = self.client.get(f'/api/recipes/{self.recipes[0].id}/')
+        self.assertEqual(response.status_code, 404)
+
+
+class FastJSONRendererTests(APITestCase):
+    def test_same_bytes_as_json_renderer(self):
+        data = {
+            'text': 'Кириллица \u2028 и \u2029',
+            'date': datetime.datetime(2026, 1, 2, 3, 4, 5, 6000),
+            'nested': [{'id': 1, 'value': None, 'flag': True}],
+        }
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
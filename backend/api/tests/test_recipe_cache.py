@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from .utils import create_ingredients, create_recipe, create_tags, create_user
+from api.recipe_cache import (
+    RECIPE_SETTLING_KEY,
+    get_representation,
+    get_representations,
+)
+
+
+class RecipeCacheInvalidationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.tags = create_tags(2)
+        self.ingredients = create_ingredients(2)
+        self.recipe = create_recipe(
+            create_user('author'), self.tags, self.ingredients
+        )
+        self.url = f'/api/recipes/{self.recipe.id}/'
+
+    def get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_tag_delete(self):
+        self.assertEqual(len(self.get()['tags']), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tags[0].delete()
+        self.assertEqual(
+            [tag['id'] for tag in self.get()['tags']], [self.tags[1].id]
+        )
+
+    def test_ingredient_delete(self):
+        self.assertEqual(len(self.get()['ingredients']), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ingredients[0].delete()
+        self.assertEqual(
+            [item['id'] for item in self.get()['ingredients']],
+            [self.ingredients[1].id],
+        )
+
+
+@mock.patch('api.recipe_cache.get_replicas', return_value=['replica'])
+class RecipeCacheReplicaLagTests(TestCase):
+    """После правки рецепт не кешируется, пока реплики могут отставать."""
+
+    def setUp(self):
+        cache.clear()
+        self.recipe = create_recipe(create_user('author'))
+        self.builds = []
+
+    def build(self):
+        self.builds.append(self.recipe.id)
+        return {'id': self.recipe.id, 'build': len(self.builds)}
+
+    def build_many(self, recipe_ids):
+        return {recipe_id: self.build() for recipe_id in recipe_ids}
+
+    def edit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.save()
+
+    def test_single_representation(self, get_replicas):
+        self.edit()
+        get_representation(self.recipe.id, None, self.build)
+        get_representation(self.recipe.id, None, self.build)
+        self.assertEqual(len(self.builds), 2)
+        cache.delete(RECIPE_SETTLING_KEY.format(self.recipe.id))
+        get_representation(self.recipe.id, None, self.build)
+        get_representation(self.recipe.id, None, self.build)
+        self.assertEqual(len(self.builds), 3)
+
+    def test_representation_list(self, get_replicas):
+        self.edit()
+        for _ in range(2):
+            data = get_representations([self.recipe.id], None, self.build_many)
+        self.assertEqual(data[self.recipe.id]['build'], 2)
+        cache.delete(RECIPE_SETTLING_KEY.format(self.recipe.id))
+        for _ in range(2):
+            data = get_representations([self.recipe.id], None, self.build_many)
+        self.assertEqual(data[self.recipe.id]['build'], 3)
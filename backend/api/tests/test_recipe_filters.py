@@ -0,0 +1,61 @@
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from .utils import create_recipe, create_tags, create_user
+from api.filters import RecipeFilter
+from food.models import Cart, Favorite, Recipe
+
+
+class RecipeFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.tags = create_tags(3)
+        author = create_user('author')
+        cls.both = create_recipe(author, cls.tags[:2], name='Оба тега')
+        cls.first = create_recipe(author, cls.tags[:1], name='Первый тег')
+        create_recipe(author, cls.tags[2:], name='Третий тег')
+        Favorite.objects.create(user=cls.user, recipe=cls.first)
+        Cart.objects.create(user=cls.user, recipe=cls.both)
+
+    def filter(self, **params):
+        request = APIRequestFactory().get('/api/recipes/', params)
+        request.user = self.user
+        return RecipeFilter(
+            request.GET, Recipe.objects.all(), request=request
+        ).qs
+
+    def explain(self, queryset):
+        """План запроса, когда у планировщика нет выбора кроме индексов."""
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_tags_without_duplicates(self):
+        recipes = self.filter(tags=[tag.slug for tag in self.tags[:2]])
+        self.assertEqual(recipes.count(), 2)
+        self.assertEqual(
+            list(recipes.values_list('id', flat=True)),
+            [self.first.id, self.both.id],
+        )
+
+    def test_tags_use_index(self):
+        plan = self.explain(
+            self.filter(tags=[tag.slug for tag in self.tags[:2]])
+        )
+        self.assertIn('recipe_tags_tag_recipe_idx', plan)
+        self.assertNotIn('Seq Scan on food_recipe_tags', plan)
+        self.assertNotIn('Hash Join', plan)
+
+    def test_marks(self):
+        self.assertEqual(list(self.filter(is_favorited=1)), [self.first])
+        self.assertEqual(list(self.filter(is_in_shopping_cart=1)), [self.both])
+        self.assertEqual(self.filter(is_favorited=0).count(), 3)
+
+    def test_marks_use_semi_join(self):
+        recipes = self.filter(is_favorited=1, is_in_shopping_cart=1)
+        self.assertEqual(str(recipes.query).count('EXISTS'), 2)
+        plan = self.explain(recipes)
+        self.assertNotIn('Seq Scan on food_favorite', plan)
+        self.assertNotIn('Seq Scan on food_cart', plan)
@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from .utils import create_ingredients, create_recipe, create_tags, create_user
+
+# COUNT, страница, авторы с подписками, теги, ингредиенты, id избранного
+# и корзины пользователя.
+RECIPE_LIST_QUERIES = 7
+
+
+class RecipeListQueriesTests(APITestCase):
+    """Число запросов списка рецептов не зависит от размера страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        tags = create_tags(3)
+        ingredients = create_ingredients(5)
+        for number in range(25):
+            create_recipe(
+                create_user(f'author{number}'),
+                tags[:number % 3 + 1],
+                ingredients[:number % 5 + 1],
+                name=f'Рецепт {number}',
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def assert_list_queries(self, limit):
+        with self.assertNumQueries(RECIPE_LIST_QUERIES):
+            response = self.client.get('/api/recipes/', {'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), limit)
+
+    def test_small_page(self):
+        self.assert_list_queries(6)
+
+    def test_large_page(self):
+        self.assert_list_queries(20)
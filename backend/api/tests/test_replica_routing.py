@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from .utils import create_recipe, create_user
+from foodgram_backend.routers import STICKY_COOKIE, ReplicaRouter
+
+REPLICA = 'replica'
+
+
+class ReplicaRoutingTests(APITestCase):
+    """
+    Вторая база — зеркало основной на том же соединении, как TEST MIRROR
+    в настройках: данные теста видны, а алиас показывает, куда ушло чтение.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.recipe = create_recipe(create_user('author'))
+
+    def setUp(self):
+        cache.clear()
+        connections[REPLICA] = connections['default']
+        self.addCleanup(connections.__delitem__, REPLICA)
+        patcher = mock.patch(
+            'foodgram_backend.routers.get_replicas', return_value=[REPLICA]
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.reads = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record_read(router, model, **hints):
+            alias = db_for_read(router, model, **hints)
+            self.reads.append(alias)
+            return alias
+
+        patcher = mock.patch.object(ReplicaRouter, 'db_for_read', record_read)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def token_client(self, user):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    def read_aliases(self, client):
+        self.reads.clear()
+        response = client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        return set(self.reads)
+
+    def write(self, client):
+        response = client.post(f'/api/recipes/{self.recipe.id}/favorite/')
+        self.assertEqual(response.status_code, 201)
+        return response
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(self.read_aliases(self.client), {REPLICA})
+        self.assertEqual(
+            self.read_aliases(self.token_client(self.user)), {REPLICA}
+        )
+
+    def test_write_makes_token_sticky(self):
+        client = self.token_client(self.user)
+        self.write(client)
+        client.cookies.clear()
+        self.assertEqual(self.read_aliases(client), {'default'})
+
+    def test_write_makes_cookie_sticky(self):
+        client = self.token_client(self.user)
+        response = self.write(client)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        anonymous = APIClient()
+        anonymous.cookies[STICKY_COOKIE] = '1'
+        self.assertEqual(self.read_aliases(anonymous), {'default'})
+
+    def test_stickiness_is_per_client(self):
+        self.write(self.token_client(self.user))
+        other = self.token_client(create_user('other'))
+        self.assertEqual(self.read_aliases(other), {REPLICA})
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.db.models import F
+from rest_framework.test import APITestCase
+
+from .utils import create_ingredients, create_recipe, create_user
+from food.models import (
+    Cart,
+    Ingredient,
+    RecipeIngredient,
+    ShoppingListItem,
+)
+
+DOWNLOAD_URL = '/api/recipes/download_shopping_cart/'
+
+
+class ShoppingCartDownloadTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('buyer')
+        cls.ingredient, = create_ingredients(1)
+        recipe = create_recipe(
+            create_user('author'), ingredients=[cls.ingredient]
+        )
+        Cart.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def download(self, **headers):
+        return self.client.get(
+            DOWNLOAD_URL, HTTP_ACCEPT='text/plain', **headers
+        )
+
+    def test_not_modified_for_same_etag(self):
+        etag = self.download()['ETag']
+        response = self.download(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_ingredient_rename_changes_etag(self):
+        etag = self.download()['ETag']
+        self.ingredient.name = 'Новое название'
+        self.ingredient.measurement_unit = 'кг'
+        self.ingredient.save()
+        response = self.download(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('Новое название - 10, кг', content)
+
+    def test_changed_amounts_with_same_totals_change_etag(self):
+        """+1/-2/+1 на соседних id не меняют ни числа строк, ни сумм."""
+        ingredients = [
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('мука', 'соль', 'сахар')
+        ]
+        recipe = create_recipe(self.user, ingredients=ingredients)
+        Cart.objects.create(user=self.user, recipe=recipe)
+        etag = self.download()['ETag']
+        for ingredient, delta in zip(ingredients, (1, -2, 1)):
+            RecipeIngredient.objects.filter(
+                recipe=recipe, ingredient=ingredient
+            ).update(amount=F('amount') + delta)
+            ShoppingListItem.objects.filter(
+                user=self.user, ingredient=ingredient
+            ).update(amount=F('amount') + delta)
+        response = self.download(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
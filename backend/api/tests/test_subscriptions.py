@@ -0,0 +1,42 @@
+from rest_framework.test import APITestCase
+
+from .utils import create_recipe, create_user
+
+
+class SubscriptionRecipesTests(APITestCase):
+    """Карточка автора одинакова в подписке и в списке подписок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        cls.author = create_user('author')
+        cls.recipe_ids = [
+            create_recipe(cls.author, name=f'Рецепт {number}').id
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_authenticate(self.reader)
+
+    def recipes(self, data):
+        return [recipe['id'] for recipe in data['recipes']]
+
+    def assert_same_card(self, query, expected):
+        response = self.client.post(
+            f'/api/users/{self.author.id}/subscribe/{query}'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.recipes(response.data), expected)
+        response = self.client.get(f'/api/users/subscriptions/{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.recipes(response.data['results'][0]), expected
+        )
+
+    def test_limited_cards_show_newest(self):
+        self.assert_same_card(
+            '?recipes_limit=2', self.recipe_ids[::-1][:2]
+        )
+
+    def test_full_cards_show_newest_first(self):
+        self.assert_same_card('', self.recipe_ids[::-1])
@@ -0,0 +1,46 @@
+from food.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+
+
+def create_user(username, **fields):
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        first_name='Имя',
+        last_name='Фамилия',
+        password='password',
+        **fields,
+    )
+
+
+def create_tags(count):
+    return [
+        Tag.objects.create(
+            name=f'Тег {number}',
+            color=f'#{number:06X}',
+            slug=f'tag-{number}',
+        )
+        for number in range(count)
+    ]
+
+
+def create_ingredients(count):
+    return [
+        Ingredient.objects.create(
+            name=f'Ингредиент {number}', measurement_unit='г'
+        )
+        for number in range(count)
+    ]
+
+
+def create_recipe(author, tags=(), ingredients=(), name='Рецепт'):
+    """Рецепт с тегами и ингредиентами по 10 единиц каждого."""
+    recipe = Recipe.objects.create(
+        author=author, name=name, text='Описание', cooking_time=10
+    )
+    recipe.tags.set(tags)
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=10)
+        for ingredient in ingredients
+    )
+    return recipe
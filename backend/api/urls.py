@@ -1,6 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
+from .instrumentation import metrics
 from .views import (
     IngredientViewSet,
     TagViewSet,
@@ -16,6 +17,7 @@ router.register(r'users', CustomUserViewSet)
 
 
 urlpatterns = [
+    path('metrics/', metrics, name='metrics'),
     path('', include(router.urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
@@ -1,15 +1,27 @@
-from django.shortcuts import get_object_or_404, HttpResponse
-from django.db.models import Sum
+from hashlib import md5
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.db.models import BooleanField, CharField, F, Value
+from django.db.models.functions import MD5, Concat
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import (
     AllowAny,
     IsAuthenticated,
 )
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 
 from .filters import IngredientFilter, RecipeFilter
 from food.models import (
@@ -18,10 +30,29 @@ from food.models import (
     Ingredient,
     Tag,
     Recipe,
-    RecipeIngredient,
+    ShoppingListItem,
 )
+from food.catalog import get_catalog_version
+from food.feed import feed_page
+from food.membership import add_recipes, remove_recipes
+from food.search import ingredient_index
 from users.models import Subscription, User
+
+from .instrumentation import SerializationTimingMixin, serialization_timer
+from .pagination import (
+    RecipePagination,
+    UserPagination,
+    decode_feed_cursor,
+    encode_feed_cursor,
+)
 from .permissions import IsAuthorOrAdminOrReadOnly
+from .projections import FAST_READ_PATH, recipe_list, tag_list
+from .renderers import (
+    FastJSONRenderer,
+    ShoppingListCSVRenderer,
+    ShoppingListJSONRenderer,
+    ShoppingListTextRenderer,
+)
 from .serializers import (
     CartSerializer,
     FavoriteSerializer,
@@ -29,14 +60,71 @@ from .serializers import (
     TagSerializer,
     PostRecipeSerializer,
     RecipeSerializer,
+    RecipeIdsSerializer,
     RecipeSmallSerializer,
     UserSubscriptionSerializer,
     SubscriptionSerializer,
 )
 
+SHOPPING_CART_CHUNK_SIZE = 500
+# orjson только там, где ответы собираются быстрым путем чтения.
+READ_PATH_RENDERER_CLASSES = (
+    (FastJSONRenderer, BrowsableAPIRenderer)
+    if FAST_READ_PATH
+    else api_settings.DEFAULT_RENDERER_CLASSES
+)
+
+
+def shopping_cart_etag(request, *args, **kwargs):
+    """
+    ETag списка покупок: md5 самих строк (ingredient_id:amount по
+    порядку ингредиентов), версия каталога ингредиентов (названия
+    и единицы) и выбранный формат.
+    """
+    fingerprint = ShoppingListItem.objects.filter(
+        user=request.user
+    ).aggregate(
+        digest=MD5(
+            StringAgg(
+                Concat(
+                    'ingredient_id',
+                    Value(':'),
+                    'amount',
+                    output_field=CharField(),
+                ),
+                ',',
+                ordering='ingredient_id',
+            )
+        )
+    )['digest']
+    catalog = get_catalog_version(Ingredient)
+    return md5(
+        f'{request.accepted_renderer.format}:{catalog}:{fingerprint}'.encode()
+    ).hexdigest()
+
+
+class CatalogCacheMixin:
+    """
+    Справочники отдаются с сильным ETag от версии каталога и заголовком
+    Cache-Control, повторный запрос с If-None-Match получает 304.
+    """
+
+    def get_catalog_version(self):
+        return get_catalog_version(self.queryset.model)
+
+    def get_etag(self, request, *args, **kwargs):
+        version = self.get_catalog_version()
+        return md5(f'{version}:{request.get_full_path()}'.encode()).hexdigest()
+
+    def dispatch(self, request, *args, **kwargs):
+        view = cache_control(public=True, max_age=settings.CATALOG_MAX_AGE)(
+            condition(etag_func=self.get_etag)(super().dispatch)
+        )
+        return view(request, *args, **kwargs)
+
 
-class CustomUserViewSet(UserViewSet):
-    pagination_class = LimitOffsetPagination
+class CustomUserViewSet(SerializationTimingMixin, UserViewSet):
+    pagination_class = UserPagination
 
     def get_permissions(self):
         if self.action == 'me':
@@ -50,6 +138,7 @@ class CustomUserViewSet(UserViewSet):
         url_path='subscribe',
         url_name='subscribe',
     )
+    @transaction.atomic
     def subscribe(self, request, id):
         author = get_object_or_404(User, id=id)
         serializer = SubscriptionSerializer(
@@ -83,15 +172,29 @@ class CustomUserViewSet(UserViewSet):
         url_name='subscriptions',
     )
     def subscriptions(self, request):
-        queryset = User.objects.filter(following__user=request.user)
+        queryset = User.objects.filter(following__user=request.user).annotate(
+            is_subscribed=Value(True, output_field=BooleanField()),
+        )
         paginate = self.paginate_queryset(queryset)
+        recipes_limit = request.query_params.get('recipes_limit')
+        recipes_by_author = Recipe.objects.top_for_authors(
+            [author.id for author in paginate],
+            int(recipes_limit) if recipes_limit else None,
+        )
         serializer = UserSubscriptionSerializer(
-            paginate, many=True, context={'request': request}
+            paginate,
+            many=True,
+            context={
+                'request': request,
+                'recipes_by_author': recipes_by_author,
+            },
         )
-        return self.get_paginated_response(serializer.data)
+        with serialization_timer():
+            data = serializer.data
+        return self.get_paginated_response(data)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
@@ -99,18 +202,37 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
 
+    def get_catalog_version(self):
+        # ETag от той же версии, из которой собран отдаваемый индекс.
+        return ingredient_index.version()
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_index.search(name))
+        return Response(ingredient_index.all())
+
+
+class TagViewSet(
+    CatalogCacheMixin, SerializationTimingMixin, viewsets.ReadOnlyModelViewSet
+):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
     permission_classes = (AllowAny,)
+    renderer_classes = READ_PATH_RENDERER_CLASSES
+
+    def list(self, request, *args, **kwargs):
+        if FAST_READ_PATH:
+            return Response(tag_list())
+        return super().list(request, *args, **kwargs)
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
-    pagination_class = LimitOffsetPagination
+    pagination_class = RecipePagination
     permission_classes = (IsAuthorOrAdminOrReadOnly,)
+    renderer_classes = READ_PATH_RENDERER_CLASSES
     http_method_names = (
         'get',
         'post',
@@ -120,6 +242,38 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def get_queryset(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            if FAST_READ_PATH:
+                return Recipe.objects.only('id', 'pub_date')
+            return Recipe.objects.with_user_flags(self.request.user)
+        return super().get_queryset()
+
+    def represent(self, recipes):
+        """
+        Данные рецептов для чтения: при FAST_READ_PATH собираются из
+        .values() в обход сериализатора, вывод тот же.
+        """
+        with serialization_timer():
+            if FAST_READ_PATH:
+                return recipe_list(
+                    [recipe.id for recipe in recipes], self.request
+                )
+            return self.get_serializer(recipes, many=True).data
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.represent(page))
+        return Response(self.represent(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        results = self.represent([self.get_object()])
+        if not results:
+            raise Http404
+        return Response(results[0])
+
     def get_serializer_class(self):
         if self.request.method in permissions.SAFE_METHODS:
             return RecipeSerializer
@@ -132,6 +286,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         url_path='favorite',
         url_name='favorite',
     )
+    @transaction.atomic
     def favorite(self, request, **kwargs):
         if request.method == 'POST':
             if not Recipe.objects.filter(id=kwargs['pk']).exists():
@@ -170,6 +325,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         url_path='shopping_cart',
         url_name='shopping_cart',
     )
+    @transaction.atomic
     def shopping_cart(self, request, **kwargs):
         if request.method == 'POST':
             if not Recipe.objects.filter(id=kwargs['pk']).exists():
@@ -201,28 +357,118 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_204_NO_CONTENT,
             )
 
+    def bulk_marks(self, request, model):
+        """
+        Пакетное добавление/удаление рецептов в избранное или корзину
+        с результатом по каждому id.
+        """
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        found = set(
+            Recipe.objects.filter(id__in=ids).values_list('id', flat=True)
+        )
+        recipe_ids = [recipe_id for recipe_id in ids if recipe_id in found]
+        if request.method == 'POST':
+            done = set(add_recipes(request.user, model, recipe_ids))
+            done_status, skipped_status = 'added', 'exists'
+        else:
+            done = set(remove_recipes(request.user, model, recipe_ids))
+            done_status, skipped_status = 'removed', 'absent'
+        results = []
+        for recipe_id in ids:
+            if recipe_id not in found:
+                result = 'not_found'
+            elif recipe_id in done:
+                result = done_status
+            else:
+                result = skipped_status
+            results.append({'id': recipe_id, 'status': result})
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        permission_classes=(IsAuthenticated,),
+        url_path='favorite',
+        url_name='favorite_bulk',
+    )
+    def favorite_bulk(self, request):
+        return self.bulk_marks(request, Favorite)
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_cart',
+        url_name='shopping_cart_bulk',
+    )
+    def shopping_cart_bulk(self, request):
+        return self.bulk_marks(request, Cart)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=(IsAuthenticated,),
+        url_path='feed',
+        url_name='feed',
+    )
+    def feed(self, request):
+        """Рецепты авторов из подписок, новые первыми, с курсором."""
+        try:
+            limit = max(1, int(request.query_params['limit']))
+        except (KeyError, ValueError):
+            limit = settings.REST_FRAMEWORK['PAGE_SIZE']
+        keys = feed_page(
+            request.user,
+            limit,
+            decode_feed_cursor(request.query_params.get('cursor')),
+        )
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for _, recipe_id in keys]
+        )
+        results = self.represent(
+            [recipes[key[1]] for key in keys if key[1] in recipes]
+        )
+        next_url = None
+        if len(keys) == limit:
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                'cursor',
+                encode_feed_cursor(keys[-1]),
+            )
+        return Response({'next': next_url, 'results': results})
+
     @action(
         detail=False,
         methods=['get'],
         permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            ShoppingListTextRenderer,
+            ShoppingListCSVRenderer,
+            ShoppingListJSONRenderer,
+        ),
         url_path='download_shopping_cart',
         url_name='download_shopping_cart',
     )
+    @method_decorator(condition(etag_func=shopping_cart_etag))
     def download_shopping_cart(self, request):
+        renderer = request.accepted_renderer
         ingredients = (
-            RecipeIngredient.objects.filter(recipe__cart__user=request.user)
-            .values('ingredient__name', 'ingredient__measurement_unit')
-            .order_by('ingredient__name')
-            .annotate(ingredient_total=Sum('amount'))
+            ShoppingListItem.objects.filter(user=request.user)
+            .values(
+                name=F('ingredient__name'),
+                measurement_unit=F('ingredient__measurement_unit'),
+                total=F('amount'),
+            )
+            .order_by('name')
+            .iterator(chunk_size=SHOPPING_CART_CHUNK_SIZE)
+        )
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients),
+            content_type=f'{renderer.media_type}; charset=utf-8',
         )
-        shopping_list = ['К покупке:\n']
-        for ingredient in ingredients:
-            name = ingredient['ingredient__name']
-            unit = ingredient['ingredient__measurement_unit']
-            amount = ingredient['ingredient_total']
-            shopping_list.append(f'\n{name} - {amount}, {unit}')
-        response = HttpResponse(shopping_list, content_type='text/plain')
         response[
             'Content-Disposition'
-        ] = 'attachment; filename="shopping_cart.txt"'
+        ] = f'attachment; filename="{renderer.filename}"'
         return response
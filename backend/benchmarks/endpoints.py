@@ -0,0 +1,180 @@
+"""
+Нагрузочный прогон основных эндпоинтов API внутри процесса Django.
+
+Запросы идут через тестовый клиент Django, поэтому вместе с задержками
+(p50/p95/p99) и пропускной способностью считается число SQL-запросов на
+каждый вызов. Данные готовит команда generate_dataset; отчет в JSON
+печатается в stdout, чтобы сравнивать его между коммитами.
+
+    python manage.py generate_dataset --users 1000
+    python benchmarks/endpoints.py --iterations 200 > before.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from food.management.commands.generate_dataset import (  # noqa: E402
+    USER_PREFIX,
+)
+from food.models import Ingredient, Recipe, Tag  # noqa: E402
+from users.models import User  # noqa: E402
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def scenarios(user):
+    """Пары (имя, [(метод, путь), ...]); один шаг сценария — один вызов."""
+    tag = Tag.objects.values_list('slug', flat=True).first()
+    ingredient = Ingredient.objects.values_list('name', flat=True).first()
+    recipe_id = (
+        Recipe.objects.exclude(author=user).values_list('id', flat=True)
+    ).first()
+    return [
+        ('recipe_list', [('get', '/api/recipes/?limit=6')]),
+        (
+            'recipe_list_filtered',
+            [('get', f'/api/recipes/?limit=6&tags={tag}&is_favorited=1')],
+        ),
+        ('recipe_detail', [('get', f'/api/recipes/{recipe_id}/')]),
+        (
+            'subscriptions',
+            [('get', '/api/users/subscriptions/?limit=6&recipes_limit=3')],
+        ),
+        (
+            'download_shopping_cart',
+            [('get', '/api/recipes/download_shopping_cart/')],
+        ),
+        (
+            'ingredient_search',
+            [('get', f'/api/ingredients/?name={ingredient[:3]}')],
+        ),
+        (
+            'favorite_toggle',
+            [
+                ('post', f'/api/recipes/{recipe_id}/favorite/'),
+                ('delete', f'/api/recipes/{recipe_id}/favorite/'),
+            ],
+        ),
+        (
+            'shopping_cart_toggle',
+            [
+                ('post', f'/api/recipes/{recipe_id}/shopping_cart/'),
+                ('delete', f'/api/recipes/{recipe_id}/shopping_cart/'),
+            ],
+        ),
+    ]
+
+
+def call(client, method, path):
+    with ExitStack() as stack:
+        captured = [
+            stack.enter_context(CaptureQueriesContext(connections[alias]))
+            for alias in settings.DATABASES
+        ]
+        started = time.perf_counter()
+        response = getattr(client, method)(path)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        elapsed = time.perf_counter() - started
+    return elapsed, sum(map(len, captured)), response.status_code < 400
+
+
+def run(client, steps, iterations, warmup):
+    for _ in range(warmup):
+        for method, path in steps:
+            call(client, method, path)
+    latencies, queries, errors = [], [], 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for method, path in steps:
+            elapsed, count, ok = call(client, method, path)
+            latencies.append(elapsed)
+            queries.append(count)
+            errors += not ok
+    total = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / total, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'queries_per_request': round(sum(queries) / len(queries), 2),
+        'max_queries': max(queries),
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument(
+        '--user', help='Username to act as (default: first synthetic one)'
+    )
+    parser.add_argument('--only', nargs='+', help='Scenario names to run')
+    options = parser.parse_args()
+    users = User.objects.filter(username__startswith=USER_PREFIX)
+    if options.user:
+        users = User.objects.filter(username=options.user)
+    user = users.order_by('id').first()
+    if user is None:
+        parser.error('No user found, run "manage.py generate_dataset" first')
+    token, _ = Token.objects.get_or_create(user=user)
+    client = Client(
+        HTTP_AUTHORIZATION=f'Token {token.key}',
+        HTTP_HOST=next(
+            (host for host in settings.ALLOWED_HOSTS if host != '*'),
+            'localhost',
+        ),
+    )
+    report = {
+        'commit': current_commit(),
+        'user': user.username,
+        'iterations': options.iterations,
+        'scenarios': {
+            name: run(client, steps, options.iterations, options.warmup)
+            for name, steps in scenarios(user)
+            if not options.only or name in options.only
+        },
+    }
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
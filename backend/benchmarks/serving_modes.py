@@ -0,0 +1,172 @@
+"""
+Сравнение WSGI (sync gunicorn) и ASGI (uvicorn workers) при одинаковом
+бюджете памяти.
+
+Для каждого режима замеряется память одного прогретого воркера, по ней
+считается число воркеров, помещающихся в бюджет, после чего сервер
+перезапускается и нагружается запросами с разной конкурентностью.
+
+Ограничение ASGI-режима: представления и middleware синхронные, Django
+вызывает их через sync_to_async с thread_sensitive=True, поэтому все
+запросы воркера обрабатываются в одном потоке по очереди. Асинхронных
+представлений в проекте нет: uvicorn-воркер выигрывает только на
+медленных клиентах и потоковых ответах, а под нагрузкой на базу его
+надо сравнивать с одним синхронным воркером, а не с числом соединений.
+
+    python benchmarks/serving_modes.py --memory-budget-mb 512 \\
+        --path /api/recipes/ --concurrency 10 50 200
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+MODES = {
+    'wsgi': (['foodgram_backend.wsgi'], {'ASGI_MODE': 'False'}),
+    'asgi': (
+        ['-k', 'uvicorn.workers.UvicornWorker', 'foodgram_backend.asgi'],
+        {'ASGI_MODE': 'True'},
+    ),
+}
+
+
+def process_tree_rss(pid):
+    """Суммарный RSS процесса и его потомков в мегабайтах (Linux)."""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as status:
+                for line in status:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+            with open(f'/proc/{current}/task/{current}/children') as children:
+                pending.extend(int(child) for child in children.read().split())
+        except FileNotFoundError:
+            continue
+    return total / 1024
+
+
+def start_server(mode, workers, port):
+    args, env = MODES[mode]
+    return subprocess.Popen(
+        [
+            sys.executable, '-m', 'gunicorn',
+            '--bind', f'127.0.0.1:{port}',
+            '--workers', str(workers),
+            *args,
+        ],
+        cwd=BASE_DIR,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def fetch(url, headers):
+    started = time.perf_counter()
+    try:
+        with urlopen(Request(url, headers=headers), timeout=30) as response:
+            response.read()
+            ok = response.status < 400
+    except (URLError, OSError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def wait_ready(url, headers, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if fetch(url, headers)[1]:
+            return
+        time.sleep(0.2)
+    raise RuntimeError(f'Server did not answer on {url}')
+
+
+def run_load(url, headers, concurrency, requests):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(
+            executor.map(lambda _: fetch(url, headers), range(requests))
+        )
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': sum(not ok for _, ok in results),
+        'throughput_rps': round(requests / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+def benchmark_mode(mode, options, headers):
+    url = f'http://127.0.0.1:{options.port}{options.path}'
+    server = start_server(mode, 1, options.port)
+    try:
+        wait_ready(url, headers)
+        run_load(url, headers, 4, 50)
+        rss_per_worker = process_tree_rss(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+    workers = max(1, int(options.memory_budget_mb // rss_per_worker))
+    server = start_server(mode, workers, options.port)
+    try:
+        wait_ready(url, headers)
+        runs = [
+            run_load(url, headers, concurrency, options.requests)
+            for concurrency in options.concurrency
+        ]
+        memory = process_tree_rss(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        'workers': workers,
+        'rss_single_worker_mb': round(rss_per_worker, 1),
+        'rss_total_mb': round(memory, 1),
+        'runs': runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--memory-budget-mb', type=float, default=512)
+    parser.add_argument('--path', default='/api/recipes/')
+    parser.add_argument('--token', help='Auth token for private endpoints')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument(
+        '--concurrency', type=int, nargs='+', default=[10, 50, 200]
+    )
+    parser.add_argument('--modes', nargs='+', default=list(MODES))
+    options = parser.parse_args()
+    headers = {}
+    if options.token:
+        headers['Authorization'] = f'Token {options.token}'
+    report = {
+        'path': options.path,
+        'memory_budget_mb': options.memory_budget_mb,
+        'modes': {
+            mode: benchmark_mode(mode, options, headers)
+            for mode in options.modes
+        },
+    }
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,9 @@
+from collections import defaultdict
+
 from django.contrib import admin
 
+from .images import schedule_variants
+from .shopping_list import apply_recipe_change, recipe_amounts
 from .models import (
     Cart,
     Favorite,
@@ -42,12 +46,26 @@ class RecipeAdmin(admin.ModelAdmin):
         'image',
     )
     list_editable = ('name', 'cooking_time', 'text', 'image', 'author')
-    readonly_fields = ('in_favorites',)
+    readonly_fields = ('in_favorites', 'in_carts_count')
     list_filter = ('name', 'author', 'tags')
     empty_value_display = '-empty-'
 
+    def save_model(self, request, obj, form, change):
+        if 'image' in form.changed_data:
+            stale = obj.image_variants.values() if change else ()
+            schedule_variants(obj, stale)
+            obj.image_variants = {}
+        super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        recipe_id = form.instance.id
+        before = recipe_amounts(recipe_id) if change else {}
+        super().save_related(request, form, formsets, change)
+        if change:
+            apply_recipe_change(recipe_id, before, recipe_amounts(recipe_id))
+
     def in_favorites(self, obj):
-        return obj.favorite_recipe.count()
+        return obj.favorites_count
 
 
 @admin.register(RecipeIngredient)
@@ -55,6 +73,39 @@ class RecipeIngredientAdmin(admin.ModelAdmin):
     list_display = ('pk', 'recipe', 'ingredient', 'amount')
     list_editable = ('recipe', 'ingredient', 'amount')
 
+    def save_model(self, request, obj, form, change):
+        """Строку можно перенести в другой рецепт: правим оба."""
+        old = None
+        if change:
+            old = (
+                RecipeIngredient.objects.filter(pk=obj.pk)
+                .values_list('recipe_id', 'ingredient_id', 'amount')
+                .first()
+            )
+        super().save_model(request, obj, form, change)
+        changes = defaultdict(lambda: ({}, {}))
+        if old is not None:
+            recipe_id, ingredient_id, amount = old
+            changes[recipe_id][0][ingredient_id] = amount
+        changes[obj.recipe_id][1][obj.ingredient_id] = obj.amount
+        for recipe_id, (before, after) in changes.items():
+            apply_recipe_change(recipe_id, before, after)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        apply_recipe_change(obj.recipe_id, {obj.ingredient_id: obj.amount}, {})
+
+    def delete_queryset(self, request, queryset):
+        removed = defaultdict(dict)
+        for recipe_id, ingredient_id, amount in queryset.values_list(
+            'recipe_id', 'ingredient_id', 'amount'
+        ):
+            amounts = removed[recipe_id]
+            amounts[ingredient_id] = amounts.get(ingredient_id, 0) + amount
+        super().delete_queryset(request, queryset)
+        for recipe_id, amounts in removed.items():
+            apply_recipe_change(recipe_id, amounts, {})
+
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class FoodConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'food'
+
+    def ready(self):
+        from . import (  # noqa: F401
+            catalog,
+            counters,
+            feed,
+            membership,
+            search,
+            shopping_list,
+        )
@@ -0,0 +1,42 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Ingredient, Tag
+
+CATALOG_VERSION_KEY = 'catalog_version:{}'
+CATALOG_VERSION_TTL = getattr(settings, 'CATALOG_VERSION_TTL', 300)
+
+
+def get_catalog_version(model):
+    """
+    Версия справочника: хеш всех его строк, закешированный до изменения.
+    Одинаковые данные дают одинаковую версию во всех процессах. Считается
+    по основной базе: версия с отстающей реплики закрепилась бы в кеше.
+    """
+    key = CATALOG_VERSION_KEY.format(model._meta.label_lower)
+    version = cache.get(key)
+    if version is None:
+        digest = md5()
+        for row in (
+            model.objects.using('default').order_by('pk').values_list()
+        ):
+            digest.update(repr(row).encode())
+        version = digest.hexdigest()
+        cache.set(key, version, CATALOG_VERSION_TTL)
+    return version
+
+
+def invalidate_catalog_version(model):
+    cache.delete(CATALOG_VERSION_KEY.format(model._meta.label_lower))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def reset_catalog_version(sender, **kwargs):
+    invalidate_catalog_version(sender)
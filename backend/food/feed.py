@@ -0,0 +1,142 @@
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from users.models import Subscription, User
+from .models import FeedEntry, Recipe
+
+FEED_FANOUT_LIMIT = getattr(settings, 'FEED_FANOUT_LIMIT', 1000)
+FEED_BACKFILL_LIMIT = getattr(settings, 'FEED_BACKFILL_LIMIT', 100)
+FEED_BATCH_SIZE = 1000
+
+
+def is_fanned_out(author):
+    """
+    Рецепты авторов с числом подписчиков до FEED_FANOUT_LIMIT при
+    публикации пишутся в ленты подписчиков; рецепты популярных авторов
+    помечаются неразосланными и забираются лентой при чтении.
+    """
+    return author.followers_count <= FEED_FANOUT_LIMIT
+
+
+def _before(cursor, date_field, id_field):
+    if cursor is None:
+        return Q()
+    pub_date, recipe_id = cursor
+    return Q(**{f'{date_field}__lt': pub_date}) | Q(
+        **{date_field: pub_date, f'{id_field}__lt': recipe_id}
+    )
+
+
+def feed_page(user, limit, cursor=None):
+    """
+    Ключи (pub_date, recipe_id) страницы ленты, новые первыми.
+    cursor — ключ последнего рецепта предыдущей страницы. Неразосланные
+    рецепты забираются у всех авторов из подписок, каким бы ни было
+    их число подписчиков сейчас.
+    """
+    keys = set(
+        FeedEntry.objects.filter(
+            _before(cursor, 'pub_date', 'recipe_id'), user=user
+        )
+        .order_by('-pub_date', '-recipe_id')
+        .values_list('pub_date', 'recipe_id')[:limit]
+    )
+    keys.update(
+        Recipe.objects.filter(
+            _before(cursor, 'pub_date', 'id'),
+            fanned_out=False,
+            author_id__in=Subscription.objects.filter(user=user).values(
+                'author_id'
+            ),
+        )
+        .order_by('-pub_date', '-id')
+        .values_list('pub_date', 'id')[:limit]
+    )
+    return sorted(keys, reverse=True)[:limit]
+
+
+def fill_timeline(user_id, author, limit=FEED_BACKFILL_LIMIT):
+    recipes = Recipe.objects.filter(author=author, fanned_out=True).order_by(
+        '-pub_date'
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author.id,
+                pub_date=pub_date,
+            )
+            for recipe_id, pub_date in recipes.values_list(
+                'id', 'pub_date'
+            )[:limit]
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def backfill_timelines(user_ids=None, clear=False):
+    """
+    Заполняет ленты по текущим подпискам: последние FEED_BACKFILL_LIMIT
+    разосланных рецептов каждого автора. Рецепты популярных авторов
+    сначала переводятся на сбор при чтении. clear — собрать заново.
+    """
+    Recipe.objects.filter(
+        fanned_out=True, author__followers_count__gt=FEED_FANOUT_LIMIT
+    ).update(fanned_out=False)
+    entries = FeedEntry.objects.all()
+    subscriptions = Subscription.objects.select_related('author')
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+        subscriptions = subscriptions.filter(user_id__in=user_ids)
+    if clear:
+        entries.delete()
+    count = 0
+    for subscription in subscriptions.iterator():
+        fill_timeline(subscription.user_id, subscription.author)
+        count += 1
+    return count
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_publishing(sender, instance, raw, **kwargs):
+    if instance._state.adding and not raw:
+        instance.fanned_out = is_fanned_out(
+            User.objects.only('followers_count').get(pk=instance.author_id)
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(sender, instance, created, **kwargs):
+    if not created or not instance.fanned_out:
+        return
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                recipe_id=instance.id,
+                author_id=instance.author_id,
+                pub_date=instance.pub_date,
+            )
+            for user_id in Subscription.objects.filter(
+                author_id=instance.author_id
+            ).values_list('user_id', flat=True)
+        ),
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+@receiver(post_save, sender=Subscription)
+def subscribed(sender, instance, created, **kwargs):
+    if created:
+        fill_timeline(instance.user_id, instance.author)
+
+
+@receiver(post_delete, sender=Subscription)
+def unsubscribed(sender, instance, **kwargs):
+    FeedEntry.objects.filter(
+        user_id=instance.user_id, author_id=instance.author_id
+    ).delete()
@@ -0,0 +1,84 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+IMAGE_VARIANTS = {
+    'card': ((600, 600), 'JPEG', 'jpg'),
+    'thumbnail': ((240, 240), 'JPEG', 'jpg'),
+    'webp': ((600, 600), 'WEBP', 'webp'),
+}
+IMAGE_VARIANT_QUALITY = 85
+IMAGE_VARIANT_WORKERS = getattr(settings, 'IMAGE_VARIANT_WORKERS', 2)
+
+recipe_images_ready = Signal()
+
+_executor = ThreadPoolExecutor(
+    max_workers=IMAGE_VARIANT_WORKERS, thread_name_prefix='recipe-images'
+)
+
+
+def variant_name(name, variant, extension):
+    path = PurePosixPath(name)
+    return str(path.parent / 'variants' / f'{path.stem}_{variant}.{extension}')
+
+
+def render_variants(recipe_id, stale=()):
+    """
+    Строит уменьшенные копии изображения рецепта, сохраняет их рядом
+    с оригиналом и записывает пути в Recipe.image_variants.
+    """
+    recipe = Recipe.objects.filter(id=recipe_id).only('image').first()
+    if recipe is None or not recipe.image:
+        return {}
+    storage = recipe.image.storage
+    variants = {}
+    with recipe.image.open('rb') as file, Image.open(file) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+        for variant, options in IMAGE_VARIANTS.items():
+            size, image_format, extension = options
+            resized = image.copy()
+            resized.thumbnail(size)
+            buffer = BytesIO()
+            resized.save(buffer, image_format, quality=IMAGE_VARIANT_QUALITY)
+            variants[variant] = storage.save(
+                variant_name(recipe.image.name, variant, extension),
+                ContentFile(buffer.getvalue()),
+            )
+    updated = Recipe.objects.filter(
+        id=recipe_id, image=recipe.image.name
+    ).update(image_variants=variants)
+    if updated:
+        recipe_images_ready.send(sender=Recipe, recipe_id=recipe_id)
+    else:
+        stale = (*stale, *variants.values())
+    for name in stale:
+        storage.delete(name)
+    return variants
+
+
+def _render_in_background(recipe_id, stale):
+    try:
+        render_variants(recipe_id, stale)
+    except Exception:
+        logger.exception('Image variants failed for recipe %s', recipe_id)
+    finally:
+        connections.close_all()
+
+
+def schedule_variants(recipe, stale=()):
+    """Ставит генерацию копий в пул потоков после коммита транзакции."""
+    stale = tuple(stale)
+    transaction.on_commit(
+        lambda: _executor.submit(_render_in_background, recipe.id, stale)
+    )
@@ -0,0 +1,23 @@
+from typing import Any
+
+from django.core.management import BaseCommand, CommandParser
+
+from food.feed import backfill_timelines
+
+
+class Command(BaseCommand):
+    help = 'Add missing entries to subscription feeds'
+    clear = False
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--user',
+            type=int,
+            nargs='+',
+            dest='users',
+            help='Only these user ids',
+        )
+
+    def handle(self, *args: Any, **options: Any):
+        count = backfill_timelines(options['users'], clear=self.clear)
+        self.stdout.write(f'Feeds filled from {count} subscriptions.')
@@ -0,0 +1,221 @@
+import random
+import time
+from itertools import accumulate
+from typing import Any
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+    call_command,
+)
+from django.db import transaction
+
+from food.counters import rebuild_counters
+from food.feed import backfill_timelines
+from food.models import (
+    Cart,
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+)
+from food.shopping_list import rebuild_shopping_lists
+from users.models import Subscription, User
+
+BATCH_SIZE = 1000
+USER_PREFIX = 'bench_user_'
+PASSWORD = 'bench-password'
+TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+    ('Десерт', '#F5C542', 'dessert'),
+    ('Выпечка', '#B0704A', 'baking'),
+)
+WORDS = (
+    'суп', 'салат', 'пирог', 'рагу', 'каша', 'запеканка', 'паста',
+    'омлет', 'котлеты', 'плов', 'блины', 'сырники', 'борщ', 'жаркое',
+    'домашний', 'быстрый', 'острый', 'сливочный', 'овощной', 'летний',
+)
+
+
+class PowerLaw:
+    """Выбор элементов с вероятностью, убывающей как 1 / rank ** skew."""
+
+    def __init__(self, items, skew, rng):
+        self.items = list(items)
+        self.rng = rng
+        self.weights = list(
+            accumulate(
+                1 / rank ** skew for rank in range(1, len(self.items) + 1)
+            )
+        )
+
+    def sample(self, count, exclude=None):
+        count = min(count, len(self.items) - (exclude is not None))
+        chosen = set()
+        while len(chosen) < count:
+            chosen.update(
+                self.rng.choices(
+                    self.items,
+                    cum_weights=self.weights,
+                    k=count - len(chosen),
+                )
+            )
+            chosen.discard(exclude)
+        return chosen
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with a synthetic dataset for benchmarks'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes-per-user', type=int, default=10)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument('--favorites-per-user', type=int, default=30)
+        parser.add_argument('--carts-per-user', type=int, default=5)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Power-law exponent for follow, favorite and cart targets',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--ingredients',
+            type=str,
+            help='Catalog imported when the ingredient table is empty',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args: Any, **options: Any):
+        if User.objects.filter(username__startswith=USER_PREFIX).exists():
+            raise CommandError(
+                'Synthetic users already exist, flush the database first.'
+            )
+        rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        started = time.monotonic()
+        if not Ingredient.objects.exists():
+            if not options['ingredients']:
+                raise CommandError(
+                    'The ingredient table is empty, pass --ingredients '
+                    'with a catalog to import.'
+                )
+            call_command('import_ingredients', path=options['ingredients'])
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        with transaction.atomic():
+            tag_ids = self.create_tags()
+            user_ids = self.create_users(options['users'])
+            recipe_ids = self.create_recipes(
+                user_ids, tag_ids, ingredient_ids, rng, options
+            )
+            skew = options['skew']
+            authors = PowerLaw(user_ids, skew, rng)
+            recipes = PowerLaw(recipe_ids, skew, rng)
+            for model, field, targets, per_user in (
+                (Subscription, 'author_id', authors, 'follows_per_user'),
+                (Favorite, 'recipe_id', recipes, 'favorites_per_user'),
+                (Cart, 'recipe_id', recipes, 'carts_per_user'),
+            ):
+                self.create_links(
+                    model, field, user_ids, targets, options[per_user]
+                )
+            rebuild_counters()
+            rebuild_shopping_lists(user_ids)
+        backfill_timelines(user_ids)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{len(user_ids)} users, {len(recipe_ids)} recipes created '
+                f'in {time.monotonic() - started:.1f}s. '
+                f'Password for every user: {PASSWORD}'
+            )
+        )
+
+    def create_tags(self):
+        for name, color, slug in TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color}
+            )
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def create_users(self, count):
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f'{USER_PREFIX}{number}',
+                    email=f'{USER_PREFIX}{number}@example.com',
+                    first_name='Bench',
+                    last_name=f'User {number}',
+                    password=password,
+                )
+                for number in range(count)
+            ),
+            batch_size=self.batch_size,
+        )
+        return list(
+            User.objects.filter(username__startswith=USER_PREFIX)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+
+    def create_recipes(self, user_ids, tag_ids, ingredient_ids, rng, options):
+        recipes = Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author_id=user_id,
+                    name=' '.join(rng.sample(WORDS, 3)).capitalize(),
+                    text=' '.join(rng.choices(WORDS, k=60)),
+                    cooking_time=rng.randint(5, 180),
+                )
+                for user_id in user_ids
+                for _ in range(options['recipes_per_user'])
+            ),
+            batch_size=self.batch_size,
+        )
+        recipe_ids = [recipe.id for recipe in recipes]
+        per_recipe = min(
+            options['ingredients_per_recipe'], len(ingredient_ids)
+        )
+        RecipeIngredient.objects.bulk_create(
+            (
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=rng.randint(1, 500),
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in rng.sample(ingredient_ids, per_recipe)
+            ),
+            batch_size=self.batch_size,
+        )
+        Recipe.tags.through.objects.bulk_create(
+            (
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in rng.sample(tag_ids, rng.randint(1, 2))
+            ),
+            batch_size=self.batch_size,
+        )
+        return recipe_ids
+
+    def create_links(self, model, target_field, user_ids, targets, per_user):
+        """Связи пользователь -> цель, цели выбираются по степенному закону."""
+        model.objects.bulk_create(
+            (
+                model(user_id=user_id, **{target_field: target_id})
+                for user_id in user_ids
+                for target_id in targets.sample(
+                    per_user,
+                    exclude=user_id if model is Subscription else None,
+                )
+            ),
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
@@ -0,0 +1,27 @@
+from typing import Any
+
+from django.core.management import BaseCommand, CommandParser
+
+from food.images import render_variants
+from food.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Generate resized variants of recipe images'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Only recipes without generated variants',
+        )
+
+    def handle(self, *args: Any, **options: Any):
+        recipes = Recipe.objects.exclude(image='')
+        if options['missing']:
+            recipes = recipes.filter(image_variants={})
+        done = 0
+        for recipe in recipes.only('id', 'image_variants').iterator():
+            render_variants(recipe.id, recipe.image_variants.values())
+            done += 1
+        self.stdout.write(f'Image variants generated for {done} recipes.')
@@ -1,26 +1,107 @@
 import csv
-from typing import Any
+import time
+from pathlib import Path
+from typing import Any, Iterator, Tuple
 
-from django.core.management import BaseCommand, CommandParser
+import ijson
+from django.core.management import BaseCommand, CommandError, CommandParser
+from django.db import transaction
 
+from food.catalog import invalidate_catalog_version
 from food.models import Ingredient
 
+BATCH_SIZE = 1000
+HEADER = ('name', 'measurement_unit')
+
+
+def read_csv(path: Path) -> Iterator[Tuple[str, str]]:
+    with open(path, 'rt', encoding='utf-8') as file:
+        for row in csv.reader(file):
+            if len(row) >= 2 and tuple(row[:2]) != HEADER:
+                yield row[0].strip(), row[1].strip()
+
+
+def read_json(path: Path) -> Iterator[Tuple[str, str]]:
+    """Элементы массива по одному, без загрузки файла целиком."""
+    with open(path, 'rb') as file:
+        for item in ijson.items(file, 'item'):
+            yield item['name'].strip(), item['measurement_unit'].strip()
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
 
 class Command(BaseCommand):
-    help = 'Import ingredients from .csv file'
+    help = 'Import ingredients from .csv or .json file'
 
     def add_arguments(self, parser: CommandParser) -> None:
-        parser.add_argument('--path', type=str, help="Path to .csv file")
+        parser.add_argument(
+            '--path',
+            type=str,
+            required=True,
+            help='Path to .csv or .json file',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Rows per INSERT statement',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Parse and dedupe the file without writing to the database',
+        )
 
     def handle(self, *args: Any, **options: Any):
-        csv_file = options['path']
-
-        with open(csv_file, 'rt', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            next(reader)
+        path = Path(options['path'])
+        reader = READERS.get(path.suffix.lower())
+        if reader is None:
+            raise CommandError(f'Unsupported file type: {path.suffix}')
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
 
-            for row in reader:
-                Ingredient.objects.get_or_create(
-                    name=row[0], measurement_unit=row[1]
+        started = time.monotonic()
+        seen = set(
+            Ingredient.objects.values_list('name', 'measurement_unit')
+        )
+        before = len(seen)
+        total = 0
+        batch = []
+        with transaction.atomic():
+            for name, measurement_unit in reader(path):
+                total += 1
+                if not name or (name, measurement_unit) in seen:
+                    continue
+                seen.add((name, measurement_unit))
+                batch.append(
+                    Ingredient(name=name, measurement_unit=measurement_unit)
                 )
-            self.stdout.write('The data from sheets imported.')
+                if len(batch) >= batch_size:
+                    self.flush(batch, dry_run)
+            self.flush(batch, dry_run)
+            after = len(seen) if dry_run else Ingredient.objects.count()
+        if after > before and not dry_run:
+            # bulk_create не шлет post_save: сбрасываем общую версию
+            # каталога, по ней индексы процессов увидят новые строки.
+            invalidate_catalog_version(Ingredient)
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        inserted = after - before
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{"Dry run: " if dry_run else ""}'
+                f'{total} rows read, {inserted} inserted, '
+                f'{total - inserted} skipped '
+                f'in {elapsed:.2f}s ({total / elapsed:.0f} rows/s).'
+            )
+        )
+
+    @staticmethod
+    def flush(batch, dry_run):
+        if batch and not dry_run:
+            Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+        batch.clear()
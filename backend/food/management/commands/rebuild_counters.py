@@ -0,0 +1,15 @@
+from typing import Any
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from food.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Recalculate favorite, cart, recipe and follower counters'
+
+    def handle(self, *args: Any, **options: Any):
+        with transaction.atomic():
+            rebuild_counters()
+        self.stdout.write('Counters rebuilt.')
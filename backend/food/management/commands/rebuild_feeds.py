@@ -0,0 +1,6 @@
+from .backfill_feeds import Command as BackfillCommand
+
+
+class Command(BackfillCommand):
+    help = 'Clear and refill subscription feeds'
+    clear = True
@@ -0,0 +1,37 @@
+from typing import Any
+
+from django.core.management import BaseCommand, CommandError, CommandParser
+
+from food.shopping_list import find_mismatches, rebuild_shopping_lists
+
+
+class Command(BaseCommand):
+    help = 'Check or rebuild the aggregated shopping lists'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--user',
+            type=int,
+            nargs='+',
+            dest='users',
+            help='Only these user ids',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Report users whose list differs from their cart',
+        )
+
+    def handle(self, *args: Any, **options: Any):
+        users = options['users']
+        if options['check']:
+            mismatched = find_mismatches(users)
+            if mismatched:
+                raise CommandError(
+                    'Shopping lists out of sync for users: '
+                    + ', '.join(map(str, mismatched))
+                )
+            self.stdout.write('Shopping lists are consistent.')
+            return
+        rebuild_shopping_lists(users)
+        self.stdout.write('Shopping lists rebuilt.')
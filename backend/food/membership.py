@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .counters import COUNTERS, change_counters
+from .models import Cart, Favorite, Recipe
+from .shopping_list import apply_cart_change
+
+MEMBERSHIP_KEY = 'recipe_membership:{}:{}'
+MEMBERSHIP_CACHE_TTL = getattr(settings, 'MEMBERSHIP_CACHE_TTL', 3600)
+INSERT_MARKS_SQL = '''
+INSERT INTO {table} (user_id, recipe_id)
+SELECT %s, recipe_id FROM unnest(%s::bigint[]) AS recipe_id
+ON CONFLICT DO NOTHING
+RETURNING recipe_id
+'''
+DELETE_MARKS_SQL = '''
+DELETE FROM {table} WHERE user_id = %s AND recipe_id = ANY(%s::bigint[])
+RETURNING recipe_id
+'''
+
+
+def membership_key(model, user_id):
+    return MEMBERSHIP_KEY.format(model._meta.model_name, user_id)
+
+
+def get_recipe_ids(user, model):
+    """
+    Множество id рецептов пользователя в избранном (Favorite) или
+    корзине (Cart); при промахе кеша загружается одним запросом.
+    """
+    key = membership_key(model, user.pk)
+    recipe_ids = cache.get(key)
+    if recipe_ids is None:
+        recipe_ids = frozenset(
+            model.objects.filter(user=user).values_list('recipe_id', flat=True)
+        )
+        cache.set(key, recipe_ids, MEMBERSHIP_CACHE_TTL)
+    return recipe_ids
+
+
+def reset_membership(model, user_id):
+    key = membership_key(model, user_id)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def _change_marks(model, sql, user_id, recipe_ids):
+    """
+    Вставка или удаление отметок одним запросом с RETURNING: возвращает
+    id, которые изменил именно этот запрос, даже при гонке с другим.
+    """
+    with connections[router.db_for_write(model)].cursor() as cursor:
+        cursor.execute(
+            sql.format(table=model._meta.db_table), [user_id, recipe_ids]
+        )
+        changed = {row[0] for row in cursor.fetchall()}
+    return [recipe_id for recipe_id in recipe_ids if recipe_id in changed]
+
+
+@transaction.atomic
+def add_recipes(user, model, recipe_ids):
+    """
+    Добавляет рецепты в избранное или корзину пачкой, без сигналов
+    на каждую строку; возвращает id действительно добавленных.
+    """
+    added = _change_marks(model, INSERT_MARKS_SQL, user.pk, recipe_ids)
+    if added:
+        change_counters(Recipe, added, COUNTERS[model], 1)
+        reset_membership(model, user.pk)
+        if model is Cart:
+            apply_cart_change(user.pk, added, 1)
+    return added
+
+
+@transaction.atomic
+def remove_recipes(user, model, recipe_ids):
+    """Убирает рецепты пачкой; возвращает id действительно убранных."""
+    removed = _change_marks(model, DELETE_MARKS_SQL, user.pk, recipe_ids)
+    if removed:
+        change_counters(Recipe, removed, COUNTERS[model], -1)
+        reset_membership(model, user.pk)
+        if model is Cart:
+            apply_cart_change(user.pk, removed, -1)
+    return removed
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Cart)
+def membership_changed(sender, instance, **kwargs):
+    reset_membership(sender, instance.user_id)
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.3 on 2026-10-18 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        Value(0),
+    )
+
+
+def fill_counters(apps, schema_editor):
+    recipe_model = apps.get_model('food', 'Recipe')
+    user_model = apps.get_model('users', 'User')
+    recipe_model.objects.update(
+        favorites_count=count(
+            apps.get_model('food', 'Favorite').objects, 'recipe'
+        ),
+        in_carts_count=count(apps.get_model('food', 'Cart').objects, 'recipe'),
+    )
+    user_model.objects.update(
+        recipes_count=count(recipe_model.objects, 'author'),
+        followers_count=count(
+            apps.get_model('users', 'Subscription').objects, 'author'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_counters'),
+        ('food', '0007_recipe_tags_tag_recipe_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.3 on 2026-10-18 12:00
+
+from django.db import migrations
+
+# 0006 проставил всем существующим рецептам один и тот же pub_date.
+# Разводим совпадающие значения по порядку id: в каждой группе последний
+# рецепт сохраняет время, предыдущие сдвигаются назад на миллисекунду.
+DISTINCT_PUB_DATE_SQL = '''
+UPDATE food_recipe AS recipe
+SET pub_date = recipe.pub_date - ranked.shift * interval '1 millisecond'
+FROM (
+    SELECT
+        id,
+        count(*) OVER (PARTITION BY pub_date)
+        - row_number() OVER (PARTITION BY pub_date ORDER BY id) AS shift
+    FROM food_recipe
+) AS ranked
+WHERE recipe.id = ranked.id AND ranked.shift > 0;
+
+UPDATE food_feedentry AS entry
+SET pub_date = recipe.pub_date
+FROM food_recipe AS recipe
+WHERE entry.recipe_id = recipe.id AND entry.pub_date <> recipe.pub_date;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food', '0011_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunSQL(DISTINCT_PUB_DATE_SQL, migrations.RunSQL.noop),
+    ]
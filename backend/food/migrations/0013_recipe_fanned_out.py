@@ -0,0 +1,33 @@
+# Generated by Django 3.2.3 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+# Разосланными считаем только рецепты, у которых есть записи в лентах:
+# рецепты, опубликованные, пока автор был популярным, лента будет
+# забирать при чтении независимо от его нынешнего числа подписчиков.
+MARK_FANNED_OUT_SQL = '''
+UPDATE food_recipe AS recipe
+SET fanned_out = EXISTS (
+    SELECT 1 FROM food_feedentry AS entry WHERE entry.recipe_id = recipe.id
+);
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food', '0012_recipe_distinct_pub_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='fanned_out',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.RunSQL(MARK_FANNED_OUT_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('fanned_out', False)), fields=['author', 'pub_date'], name='recipe_pulled_author_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.3 on 2026-10-18 02:55
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food', '0013_recipe_fanned_out'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='recipeingredient',
+            options={'ordering': ('id',)},
+        ),
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'ordering': ('id',)},
+        ),
+    ]
@@ -1,18 +1,35 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+    TrigramSimilarity,
+)
 from django.db import models
+from django.db.models import Exists, F, OuterRef, Prefetch, Window
+from django.db.models.functions import RowNumber
 from django.core.validators import (
     MinValueValidator,
     RegexValidator,
 )
 
-from users.models import User
+from users.models import Subscription, User
 
 MIN_VALUE = 1
+SEARCH_CONFIG = 'russian'
 
 
 class Ingredient(models.Model):
     name = models.CharField(max_length=128)
     measurement_unit = models.CharField(max_length=32)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'], name='unique_ingredient'
+            ),
+        ]
+
     def __str__(self) -> str:
         return self.name
 
@@ -28,14 +45,90 @@ class Tag(models.Model):
         )
     ]
 
+    class Meta:
+        ordering = ('id',)
+
     def __str__(self) -> str:
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    def with_user_flags(self, user):
+        """
+        Подгружает автора с флагом подписки пользователя, теги и
+        ингредиенты фиксированным числом запросов.
+        """
+        authors = User.objects.all()
+        if user.is_authenticated:
+            authors = authors.annotate(
+                is_subscribed=Exists(
+                    Subscription.objects.filter(
+                        user=user, author=OuterRef('pk')
+                    )
+                )
+            )
+        return self.prefetch_related(
+            Prefetch('author', queryset=authors),
+            'tags',
+            Prefetch(
+                'recipeingredient',
+                queryset=RecipeIngredient.objects.select_related('ingredient'),
+            ),
+        )
+
+    def search(self, text):
+        """
+        Полнотекстовый поиск по названию и описанию с ранжированием
+        ts_rank; если ничего не нашлось — поиск по сходству триграмм
+        названия, чтобы переживать опечатки.
+        """
+        query = SearchQuery(
+            text, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        found = self.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        )
+        if not found.exists():
+            found = self.filter(name__trigram_similar=text).annotate(
+                rank=TrigramSimilarity('name', text)
+            )
+        return found.order_by('-rank', '-pub_date', '-id')
+
+    def top_for_authors(self, author_ids, limit=None):
+        """
+        Возвращает словарь {author_id: [рецепты]} с первыми limit рецептами
+        каждого автора, выбранными одним запросом через ROW_NUMBER().
+        Порядок — как Recipe.Meta.ordering: новые первыми.
+        """
+        queryset = self.filter(author_id__in=author_ids)
+        if limit is None:
+            recipes = queryset.order_by('author_id', '-pub_date', '-id')
+        else:
+            ranked = queryset.annotate(
+                row_number=Window(
+                    expression=RowNumber(),
+                    partition_by=F('author_id'),
+                    order_by=(F('pub_date').desc(), F('id').desc()),
+                )
+            )
+            sql, params = ranked.query.sql_with_params()
+            recipes = self.raw(
+                f'SELECT * FROM ({sql}) AS ranked '
+                'WHERE ranked.row_number <= %s '
+                'ORDER BY ranked.author_id, ranked.row_number',
+                (*params, limit),
+            )
+        recipes_by_author = {author_id: [] for author_id in author_ids}
+        for recipe in recipes:
+            recipes_by_author[recipe.author_id].append(recipe)
+        return recipes_by_author
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=200)
     image = models.ImageField(upload_to='recipes_images/', blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     text = models.TextField()
     ingredients = models.ManyToManyField(
         Ingredient, through='recipeingredient'
@@ -44,6 +137,51 @@ class Recipe(models.Model):
     cooking_time = models.IntegerField(
         validators=[MinValueValidator(MIN_VALUE)]
     )
+    pub_date = models.DateTimeField(auto_now_add=True)
+    favorites_count = models.PositiveIntegerField(default=0, editable=False)
+    in_carts_count = models.PositiveIntegerField(default=0, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Разослан ли рецепт по лентам подписчиков при публикации; иначе
+    # лента забирает его при чтении.
+    fanned_out = models.BooleanField(default=True, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Автор на момент загрузки: по нему счетчики видят смену автора
+        # без лишнего SELECT перед сохранением.
+        if 'author_id' in field_names:
+            instance._loaded_author_id = values[
+                list(field_names).index('author_id')
+            ]
+        return instance
+
+    class Meta:
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(
+                fields=['pub_date', 'id'], name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='recipe_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='recipe_pulled_author_idx',
+                condition=models.Q(fanned_out=False),
+            ),
+            GinIndex(
+                fields=['search_vector'], name='recipe_search_vector_idx'
+            ),
+            GinIndex(
+                fields=['name'],
+                name='recipe_name_trgm_idx',
+                opclasses=['gin_trgm_ops'],
+            ),
+        ]
 
 
 class RecipeIngredient(models.Model):
@@ -55,6 +193,9 @@ class RecipeIngredient(models.Model):
     )
     amount = models.IntegerField(validators=[MinValueValidator(MIN_VALUE)])
 
+    class Meta:
+        ordering = ('id',)
+
 
 class Favorite(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -84,3 +225,51 @@ class Cart(models.Model):
 
     def __str__(self) -> str:
         return f'{self.recipe.name} в корзине {self.user.username}'
+
+
+class ShoppingListItem(models.Model):
+    """Сумма ингредиента по всем рецептам в корзине пользователя."""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='shopping_list'
+    )
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
+    amount = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'], name='unique_shopping_list_item'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.ingredient} {self.amount} у {self.user.username}'
+
+
+class FeedEntry(models.Model):
+    """Рецепт автора в ленте подписчика, записанный при публикации."""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='feed'
+    )
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, related_name='feed_entries'
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='+'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_feed_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_user_pub_date_idx',
+            ),
+        ]
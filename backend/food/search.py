@@ -0,0 +1,82 @@
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+
+from .catalog import get_catalog_version
+from .models import Ingredient
+
+INGREDIENT_SEARCH_LIMIT = getattr(settings, 'INGREDIENT_SEARCH_LIMIT', 50)
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса для автодополнения.
+    Поиск без учета регистра: сначала совпадения по началу названия
+    (бинарный поиск по отсортированному списку), затем по подстроке.
+    Индекс помнит версию каталога, из которой собран, и пересобирается,
+    как только общая версия в кеше стала другой, — в том числе после
+    правок в других процессах. Строки читаются с основной базы, как и
+    сама версия.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = ([], [], None)
+
+    def invalidate(self):
+        self._index = (*self._index[:2], None)
+
+    def _build(self, version):
+        rows = sorted(
+            (name.lower(), pk, name, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.using(
+                'default'
+            ).values_list('id', 'name', 'measurement_unit')
+        )
+        self._index = (
+            [row[0] for row in rows],
+            [
+                {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+                for _, pk, name, measurement_unit in rows
+            ],
+            version,
+        )
+
+    def _ensure_built(self):
+        version = get_catalog_version(Ingredient)
+        if self._index[2] != version:
+            with self._lock:
+                if self._index[2] != version:
+                    self._build(version)
+        return self._index
+
+    def version(self):
+        """Версия каталога, из которой собраны отдаваемые данные."""
+        return self._ensure_built()[2]
+
+    def all(self):
+        return self._ensure_built()[1]
+
+    def search(self, query, limit=INGREDIENT_SEARCH_LIMIT):
+        keys, items, _ = self._ensure_built()
+        query = query.lower()
+        start = bisect_left(keys, query)
+        end = start
+        while (
+            end < len(keys)
+            and end - start < limit
+            and keys[end].startswith(query)
+        ):
+            end += 1
+        result = items[start:end]
+        if len(result) < limit:
+            for key, item in zip(keys, items):
+                if query in key and not key.startswith(query):
+                    result.append(item)
+                    if len(result) >= limit:
+                        break
+        return result
+
+
+ingredient_index = IngredientIndex()
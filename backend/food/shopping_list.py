@@ -0,0 +1,168 @@
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Cart, RecipeIngredient, ShoppingListItem
+
+RECIPE_DELTAS = '''
+FROM food_cart AS cart
+CROSS JOIN unnest(%s::bigint[], %s::integer[]) AS delta(ingredient_id, amount)
+WHERE cart.recipe_id = %s
+'''
+ADD_RECIPE_DELTAS_SQL = f'''
+INSERT INTO food_shoppinglistitem (user_id, ingredient_id, amount)
+SELECT cart.user_id, delta.ingredient_id, delta.amount
+{RECIPE_DELTAS} AND delta.amount > 0
+ON CONFLICT (user_id, ingredient_id) DO UPDATE
+SET amount = food_shoppinglistitem.amount + EXCLUDED.amount
+'''
+SUBTRACT_RECIPE_DELTAS_SQL = f'''
+UPDATE food_shoppinglistitem AS item
+SET amount = GREATEST(item.amount + delta.amount, 0)
+{RECIPE_DELTAS} AND delta.amount < 0
+AND item.user_id = cart.user_id AND item.ingredient_id = delta.ingredient_id
+'''
+CART_RECIPE_TOTALS = '''
+SELECT ingredient_id, SUM(amount) AS amount
+FROM food_recipeingredient
+WHERE recipe_id = ANY(%s::bigint[])
+GROUP BY ingredient_id
+'''
+ADD_CART_RECIPES_SQL = f'''
+INSERT INTO food_shoppinglistitem (user_id, ingredient_id, amount)
+SELECT %s, totals.ingredient_id, totals.amount
+FROM ({CART_RECIPE_TOTALS}) AS totals
+ORDER BY totals.ingredient_id
+ON CONFLICT (user_id, ingredient_id) DO UPDATE
+SET amount = food_shoppinglistitem.amount + EXCLUDED.amount
+'''
+SUBTRACT_CART_RECIPES_SQL = f'''
+UPDATE food_shoppinglistitem AS item
+SET amount = GREATEST(item.amount - totals.amount, 0)
+FROM ({CART_RECIPE_TOTALS}) AS totals
+WHERE item.user_id = %s AND item.ingredient_id = totals.ingredient_id
+'''
+
+
+def apply_cart_change(user_id, recipe_ids, sign):
+    """
+    Добавляет (sign=1) или вычитает (sign=-1) ингредиенты рецептов
+    из списка покупок пользователя, трогая только затронутые строки.
+    Добавление — upsert, поэтому параллельные добавления одного
+    ингредиента не упираются в уникальность строки.
+    """
+    recipe_ids = list(recipe_ids)
+    with transaction.atomic(), connection.cursor() as cursor:
+        if sign > 0:
+            cursor.execute(ADD_CART_RECIPES_SQL, [user_id, recipe_ids])
+            return
+        cursor.execute(SUBTRACT_CART_RECIPES_SQL, [recipe_ids, user_id])
+        if cursor.rowcount:
+            ShoppingListItem.objects.filter(
+                user_id=user_id, amount__lte=0
+            ).delete()
+
+
+def recipe_amounts(recipe_id):
+    """Состав рецепта: {ingredient_id: количество}."""
+    return dict(
+        RecipeIngredient.objects.filter(recipe_id=recipe_id)
+        .order_by()
+        .values('ingredient_id')
+        .annotate(total=Sum('amount'))
+        .values_list('ingredient_id', 'total')
+    )
+
+
+def apply_recipe_change(recipe_id, before, after):
+    """
+    Переносит смену состава рецепта в списки покупок всех, у кого он
+    в корзине: только разницу количеств по ингредиентам, тремя запросами
+    на всех пользователей сразу. Без разницы ничего не делает.
+    """
+    deltas = {}
+    for ingredient_id in before.keys() | after.keys():
+        delta = after.get(ingredient_id, 0) - before.get(ingredient_id, 0)
+        if delta:
+            deltas[ingredient_id] = delta
+    if not deltas:
+        return
+    params = [list(deltas), list(deltas.values()), recipe_id]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(ADD_RECIPE_DELTAS_SQL, params)
+        cursor.execute(SUBTRACT_RECIPE_DELTAS_SQL, params)
+        ShoppingListItem.objects.filter(
+            amount=0,
+            ingredient_id__in=deltas,
+            user_id__in=Cart.objects.filter(recipe_id=recipe_id).values(
+                'user_id'
+            ),
+        ).delete()
+
+
+def expected_items(user_ids=None):
+    """Список покупок, посчитанный заново по корзинам."""
+    filters = {'recipe__cart__isnull': False}
+    if user_ids is not None:
+        filters['recipe__cart__user__in'] = user_ids
+    return {
+        (row['recipe__cart__user'], row['ingredient']): row['total']
+        for row in RecipeIngredient.objects.filter(**filters)
+        .order_by()
+        .values('recipe__cart__user', 'ingredient')
+        .annotate(total=Sum('amount'))
+    }
+
+
+def find_mismatches(user_ids=None):
+    """Id пользователей, чей сохраненный список расходится с корзиной."""
+    stored_items = ShoppingListItem.objects.order_by()
+    if user_ids is not None:
+        stored_items = stored_items.filter(user_id__in=user_ids)
+    stored = {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in stored_items.values_list(
+            'user_id', 'ingredient_id', 'amount'
+        )
+    }
+    expected = expected_items(user_ids)
+    return sorted(
+        {
+            user_id
+            for user_id, ingredient_id in stored.keys() | expected.keys()
+            if stored.get((user_id, ingredient_id))
+            != expected.get((user_id, ingredient_id))
+        }
+    )
+
+
+def rebuild_shopping_lists(user_ids=None):
+    """Пересобирает списки покупок указанных (или всех) пользователей."""
+    with transaction.atomic():
+        items = ShoppingListItem.objects.all()
+        if user_ids is not None:
+            items = items.filter(user_id__in=user_ids)
+        items.delete()
+        ShoppingListItem.objects.bulk_create(
+            (
+                ShoppingListItem(
+                    user_id=user_id, ingredient_id=ingredient_id, amount=total
+                )
+                for (user_id, ingredient_id), total in expected_items(
+                    user_ids
+                ).items()
+            ),
+            batch_size=1000,
+        )
+
+
+@receiver(post_save, sender=Cart)
+def cart_added(sender, instance, created, **kwargs):
+    if created:
+        apply_cart_change(instance.user_id, [instance.recipe_id], 1)
+
+
+@receiver(pre_delete, sender=Cart)
+def cart_removed(sender, instance, **kwargs):
+    apply_cart_change(instance.user_id, [instance.recipe_id], -1)
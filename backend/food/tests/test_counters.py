@@ -0,0 +1,48 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.utils import create_recipe, create_user
+from food.counters import rebuild_counters
+from food.models import Recipe
+from users.models import User
+
+
+class RecipeCountersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.other = create_user('other')
+        cls.recipe = create_recipe(cls.author)
+
+    def recipes_count(self, user):
+        return User.objects.values_list('recipes_count', flat=True).get(
+            pk=user.pk
+        )
+
+    def test_author_change_moves_counter(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        recipe.author = self.other
+        with CaptureQueriesContext(connection) as queries:
+            recipe.save()
+        self.assertFalse(
+            [
+                query['sql']
+                for query in queries
+                if query['sql'].startswith('SELECT "food_recipe"."author_id"')
+            ]
+        )
+        self.assertEqual(self.recipes_count(self.author), 0)
+        self.assertEqual(self.recipes_count(self.other), 1)
+        recipe.save()
+        self.assertEqual(self.recipes_count(self.other), 1)
+
+    def test_rebuild_matches_signals(self):
+        create_recipe(self.other)
+        counts = list(User.objects.order_by('pk').values_list('recipes_count'))
+        User.objects.update(recipes_count=0)
+        rebuild_counters()
+        self.assertEqual(
+            list(User.objects.order_by('pk').values_list('recipes_count')),
+            counts,
+        )
@@ -0,0 +1,41 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from api.tests.utils import create_recipe, create_user
+from food.feed import backfill_timelines, feed_page
+from food.models import FeedEntry, Recipe
+from users.models import Subscription
+
+
+@mock.patch('food.feed.FEED_FANOUT_LIMIT', 1)
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.reader = create_user('reader')
+        cls.other = create_user('other')
+
+    def feed(self, user):
+        return [recipe_id for _, recipe_id in feed_page(user, 10)]
+
+    def test_recipe_of_popular_author_is_pulled(self):
+        Subscription.objects.create(user=self.reader, author=self.author)
+        Subscription.objects.create(user=self.other, author=self.author)
+        popular = create_recipe(self.author, name='Популярный')
+        self.assertFalse(Recipe.objects.get(pk=popular.pk).fanned_out)
+        self.assertFalse(FeedEntry.objects.filter(recipe=popular).exists())
+        Subscription.objects.get(user=self.other).delete()
+        regular = create_recipe(self.author, name='Обычный')
+        self.assertTrue(Recipe.objects.get(pk=regular.pk).fanned_out)
+        self.assertEqual(self.feed(self.reader), [regular.id, popular.id])
+
+    def test_new_subscriber_gets_both_kinds(self):
+        Subscription.objects.create(user=self.other, author=self.author)
+        regular = create_recipe(self.author, name='Обычный')
+        Subscription.objects.create(user=self.reader, author=self.author)
+        popular = create_recipe(self.author, name='Популярный')
+        Subscription.objects.get(user=self.other).delete()
+        self.assertEqual(self.feed(self.reader), [popular.id, regular.id])
+        backfill_timelines(clear=True)
+        self.assertEqual(self.feed(self.reader), [popular.id, regular.id])
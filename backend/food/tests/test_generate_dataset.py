@@ -0,0 +1,11 @@
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from users.models import User
+
+
+class GenerateDatasetTests(TestCase):
+    def test_empty_catalog_needs_ingredients(self):
+        with self.assertRaisesMessage(CommandError, '--ingredients'):
+            call_command('generate_dataset', users=2)
+        self.assertFalse(User.objects.exists())
@@ -0,0 +1,48 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from food.catalog import get_catalog_version
+from food.models import Ingredient
+from food.search import ingredient_index
+
+
+class ImportIngredientsTests(TestCase):
+    def import_json(self, items):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'ingredients.json'
+            path.write_text(json.dumps(items), encoding='utf-8')
+            call_command(
+                'import_ingredients', path=str(path), stdout=StringIO()
+            )
+
+    def test_path_is_required(self):
+        with self.assertRaises(CommandError):
+            call_command('import_ingredients')
+
+    def test_import_skips_duplicates(self):
+        self.import_json(
+            [
+                {'name': 'соль', 'measurement_unit': 'г'},
+                {'name': ' соль ', 'measurement_unit': 'г'},
+                {'name': 'сахар', 'measurement_unit': 'г'},
+            ]
+        )
+        self.assertEqual(
+            sorted(Ingredient.objects.values_list('name', flat=True)),
+            ['сахар', 'соль'],
+        )
+
+    def test_import_resets_catalog_caches(self):
+        version = get_catalog_version(Ingredient)
+        self.assertEqual(ingredient_index.search('соль'), [])
+        self.import_json([{'name': 'соль', 'measurement_unit': 'г'}])
+        self.assertNotEqual(get_catalog_version(Ingredient), version)
+        self.assertEqual(
+            [item['name'] for item in ingredient_index.search('соль')],
+            ['соль'],
+        )
@@ -0,0 +1,49 @@
+from django.test import TestCase
+
+from api.tests.utils import create_ingredients, create_recipe, create_user
+from food.membership import add_recipes, get_recipe_ids, remove_recipes
+from food.models import Cart, Favorite, Recipe, ShoppingListItem
+
+
+class BulkMembershipTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('user')
+        author = create_user('author')
+        ingredients = create_ingredients(2)
+        cls.recipes = [
+            create_recipe(author, ingredients=ingredients) for _ in range(3)
+        ]
+        cls.ids = [recipe.id for recipe in cls.recipes]
+
+    def counters(self, field):
+        return list(
+            Recipe.objects.order_by('id').values_list(field, flat=True)
+        )
+
+    def test_add_reports_only_inserted(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipes[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(
+                add_recipes(self.user, Favorite, self.ids), self.ids[1:]
+            )
+        self.assertEqual(add_recipes(self.user, Favorite, self.ids), [])
+        self.assertEqual(self.counters('favorites_count'), [1, 1, 1])
+        self.assertEqual(get_recipe_ids(self.user, Favorite), set(self.ids))
+
+    def test_remove_reports_only_deleted(self):
+        add_recipes(self.user, Cart, self.ids[:2])
+        self.assertEqual(
+            remove_recipes(self.user, Cart, self.ids), self.ids[:2]
+        )
+        self.assertEqual(remove_recipes(self.user, Cart, self.ids), [])
+        self.assertEqual(self.counters('in_carts_count'), [0, 0, 0])
+        self.assertFalse(Cart.objects.exists())
+        self.assertFalse(ShoppingListItem.objects.exists())
+
+    def test_cart_fills_shopping_list(self):
+        add_recipes(self.user, Cart, self.ids)
+        self.assertEqual(
+            list(ShoppingListItem.objects.values_list('amount', flat=True)),
+            [30, 30],
+        )
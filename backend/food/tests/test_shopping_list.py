@@ -0,0 +1,161 @@
+import threading
+
+from django.contrib import admin
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.serializers import PostRecipeSerializer
+from api.tests.utils import (
+    create_ingredients,
+    create_recipe,
+    create_tags,
+    create_user,
+)
+from food.admin import RecipeIngredientAdmin
+from food.models import Cart, RecipeIngredient, ShoppingListItem
+from food.shopping_list import apply_cart_change, find_mismatches
+
+
+class RecipeChangeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        cls.buyer = create_user('buyer')
+        cls.other = create_user('other')
+        cls.tags = create_tags(1)
+        cls.ingredients = create_ingredients(3)
+        cls.recipe = create_recipe(
+            author, cls.tags, cls.ingredients[:2], name='Первый'
+        )
+        cls.second = create_recipe(
+            author, cls.tags, cls.ingredients[:1], name='Второй'
+        )
+        Cart.objects.create(user=cls.buyer, recipe=cls.recipe)
+        Cart.objects.create(user=cls.buyer, recipe=cls.second)
+        Cart.objects.create(user=cls.other, recipe=cls.second)
+
+    def shopping_list(self, user):
+        return dict(
+            ShoppingListItem.objects.filter(user=user).values_list(
+                'ingredient__name', 'amount'
+            )
+        )
+
+    def update(self, *amounts):
+        """PATCH рецепта в обход валидации: (ingredient, amount) пары."""
+        PostRecipeSerializer().update(
+            self.recipe,
+            {
+                'recipeingredient': [
+                    {'id': ingredient.id, 'amount': amount}
+                    for ingredient, amount in amounts
+                ],
+                'tags': self.tags,
+            },
+        )
+
+    def shopping_list_writes(self, queries):
+        return [
+            query['sql']
+            for query in queries
+            if 'food_shoppinglistitem' in query['sql']
+            and not query['sql'].startswith('SELECT')
+        ]
+
+    def test_update_applies_delta(self):
+        first, second, third = self.ingredients
+        self.update((first, 15), (third, 5))
+        self.assertEqual(
+            self.shopping_list(self.buyer),
+            {first.name: 25, third.name: 5},
+        )
+        self.assertEqual(self.shopping_list(self.other), {first.name: 10})
+        self.assertEqual(find_mismatches(), [])
+
+    def test_unchanged_update_skips_shopping_lists(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.update((self.ingredients[0], 10), (self.ingredients[1], 10))
+        self.assertEqual(self.shopping_list_writes(queries), [])
+
+    def test_admin_move_row(self):
+        model_admin = RecipeIngredientAdmin(RecipeIngredient, admin.site)
+        row = RecipeIngredient.objects.get(
+            recipe=self.recipe, ingredient=self.ingredients[1]
+        )
+        row.recipe = self.second
+        row.amount = 7
+        model_admin.save_model(None, row, None, True)
+        self.assertEqual(
+            self.shopping_list(self.other),
+            {self.ingredients[0].name: 10, self.ingredients[1].name: 7},
+        )
+        self.assertEqual(find_mismatches(), [])
+
+    def test_admin_delete_row(self):
+        model_admin = RecipeIngredientAdmin(RecipeIngredient, admin.site)
+        model_admin.delete_model(
+            None,
+            RecipeIngredient.objects.get(
+                recipe=self.second, ingredient=self.ingredients[0]
+            ),
+        )
+        self.assertEqual(self.shopping_list(self.other), {})
+        self.assertEqual(find_mismatches(), [])
+        model_admin.delete_queryset(
+            None, RecipeIngredient.objects.filter(recipe=self.recipe)
+        )
+        self.assertEqual(self.shopping_list(self.buyer), {})
+        self.assertEqual(find_mismatches(), [])
+
+
+class ConcurrentCartTests(TransactionTestCase):
+    def setUp(self):
+        self.buyer = create_user('buyer')
+        author = create_user('author')
+        self.ingredient, = create_ingredients(1)
+        self.recipes = [
+            create_recipe(author, ingredients=[self.ingredient])
+            for _ in range(2)
+        ]
+
+    def test_parallel_adds_of_new_ingredient(self):
+        """
+        Второе добавление ждет незакоммиченную строку первого и
+        прибавляет к ней, а не падает на уникальности.
+        """
+        first_applied = threading.Event()
+        errors = []
+
+        def add(recipe, hold):
+            try:
+                with transaction.atomic():
+                    if not hold:
+                        first_applied.wait(5)
+                    apply_cart_change(self.buyer.id, [recipe.id], 1)
+                    if hold:
+                        first_applied.set()
+                        threading.Event().wait(0.3)
+            except Exception as error:
+                errors.append(error)
+                first_applied.set()
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=add, args=(recipe, hold))
+            for recipe, hold in zip(self.recipes, (True, False))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            list(ShoppingListItem.objects.values_list('amount', flat=True)),
+            [20],
+        )
+        apply_cart_change(
+            self.buyer.id, [recipe.id for recipe in self.recipes], -1
+        )
+        self.assertFalse(ShoppingListItem.objects.exists())
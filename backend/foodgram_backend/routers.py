@@ -0,0 +1,98 @@
+import random
+from contextvars import ContextVar
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+
+STICKY_KEY = 'db_sticky:{}'
+STICKY_COOKIE = 'db_sticky'
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def get_replicas():
+    return [alias for alias in settings.DATABASES if alias != 'default']
+
+
+class ReplicaRouter:
+    """
+    Чтения безопасных запросов API уходят на реплики, все остальное —
+    на основную базу. Режим выбирает ReplicaRoutingMiddleware.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if replicas and _read_from_replica.get():
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Отправляет GET/HEAD/OPTIONS на реплики. После успешной записи клиент
+    REPLICA_STICKY_SECONDS читает с основной базы, чтобы видеть свои
+    изменения несмотря на отставание реплик. Липкость хранится в cookie
+    (не зависит от процесса-воркера) и в кеше по токену API и сессии для
+    клиентов без cookie; кеш для этого должен быть общим. Адрес клиента
+    не используется: за nginx это адрес прокси, общий для всех.
+    """
+
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def client_keys(self, request):
+        identities = (
+            request.META.get('HTTP_AUTHORIZATION'),
+            request.COOKIES.get(settings.SESSION_COOKIE_NAME),
+        )
+        return [
+            STICKY_KEY.format(md5(identity.encode()).hexdigest())
+            for identity in identities
+            if identity
+        ]
+
+    def is_sticky(self, request, keys):
+        return STICKY_COOKIE in request.COOKIES or bool(
+            keys and cache.get_many(keys)
+        )
+
+    def __call__(self, request):
+        if not get_replicas():
+            return self.get_response(request)
+        keys = self.client_keys(request)
+        use_replica = request.method in self.safe_methods and not (
+            self.is_sticky(request, keys)
+        )
+        token = _read_from_replica.set(use_replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_from_replica.reset(token)
+        if (
+            request.method not in self.safe_methods
+            and response.status_code < 400
+        ):
+            if keys:
+                cache.set_many(
+                    dict.fromkeys(keys, True), settings.REPLICA_STICKY_SECONDS
+                )
+            response.set_cookie(
+                STICKY_COOKIE,
+                '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -5,7 +5,15 @@ from .models import Subscription, User
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'username', 'email', 'first_name', 'last_name')
+    list_display = (
+        'pk',
+        'username',
+        'email',
+        'first_name',
+        'last_name',
+        'recipes_count',
+        'followers_count',
+    )
     list_filter = ('username', 'email')
     search_fields = ('username', 'email', 'first_name', 'last_name')
     empty_value_display = '-empty-'
@@ -23,6 +23,8 @@ class User(AbstractUser):
         max_length=254, unique=True, blank=False, null=False
     )
     password = models.CharField(max_length=254, blank=False, null=False)
+    recipes_count = models.PositiveIntegerField(default=0, editable=False)
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
     AbstractUser._meta.get_field(
         'groups'
     ).remote_field.related_name = 'custom_user_set'